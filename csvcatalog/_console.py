@@ -0,0 +1,16 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+_console: "Console | None" = None
+
+
+def get_console() -> "Console":
+    """returns the shared rich console, creating it on first use"""
+    global _console
+    if _console is None:
+        from rich.console import Console
+
+        _console = Console()
+    return _console
@@ -1,29 +1,51 @@
+import importlib
 from pathlib import Path
 from typing import Annotated
 
-import questionary
 import typer
-from rich.console import Console
 from typer import Context
 
-from . import __version__, config, crypto, storage
+from . import __version__, config
 from .commands import filters as filters_app
 from .commands import settings as settings_app
 from .commands import tables
-from .commands.delete import DeleteCommand
-from .commands.export import ExportCommand
-from .commands.extract import ExtractCommand
-from .commands.purge import PurgeCommand
-from .commands.search import SearchCommand
-from .commands.sql import SqlCommand
+from .commands._args import (
+    CSV_FILE_ARG,
+    DELETE_TABLE_ARG,
+    ENCODING_OPT,
+    EXPORT_TABLES_ARG,
+    QUERY_ARG,
+    SEARCH_TARGETS_ARG,
+    SEARCH_VALUE_ARG,
+    YES_OPT,
+)
 
 app = typer.Typer()
-console = Console()
+
+# maps each top-level command to "module:class", imported only when invoked
+COMMANDS = {
+    "extract": "csvcatalog.commands.extract:ExtractCommand",
+    "delete": "csvcatalog.commands.delete:DeleteCommand",
+    "purge": "csvcatalog.commands.purge:PurgeCommand",
+    "sql": "csvcatalog.commands.sql:SqlCommand",
+    "export": "csvcatalog.commands.export:ExportCommand",
+    "search": "csvcatalog.commands.search:SearchCommand",
+}
+
+
+def _run_command(name: str, ctx: Context, **kwargs):
+    """resolves the command class registered under name and runs it"""
+    module_name, class_name = COMMANDS[name].split(":")
+    command_class = getattr(importlib.import_module(module_name), class_name)
+    cmd = command_class(ctx.obj["storage"], ctx.obj["settings"])
+    return cmd.run(**kwargs)
 
 
 def version_callback(value: bool) -> None:
     if value:
-        console.print(f"csvcatalog version: {__version__}")
+        from ._console import get_console
+
+        get_console().print(f"csvcatalog version: {__version__}")
         raise typer.Exit()
 
 
@@ -55,9 +77,13 @@ def main(
     storage_path = db_path
     password = None
     if settings.encryption:
-        password = questionary.password(
+        from . import crypto, utils
+        from ._console import get_console
+
+        console = get_console()
+        password = utils.ask_password(
             "please enter the database password:", auto_enter=False
-        ).ask()
+        )
         if not password:
             console.print("[yellow]operation cancelled[/yellow]")
             raise typer.Abort()
@@ -68,6 +94,8 @@ def main(
             console.print(f"[red]error: {e}[/red]")
             raise typer.Abort() from e
 
+    from . import storage
+
     storage_instance = storage.SqliteStorage(storage_path)
     ctx.obj = {"storage": storage_instance, "settings": settings}
 
@@ -75,10 +103,12 @@ def main(
         storage_instance.close()
         if temp_db_file and password and settings.encryption:
             temp_db_file.seek(0)
-            plaintext_bytes = temp_db_file.read()
-            crypto.encrypt_bytes_to_file(plaintext_bytes, db_path, password)
+            crypto.encrypt_stream_to_file(temp_db_file, db_path, password)
         if temp_db_file:
             temp_db_file.close()
+            # sqlite's wal sidecars of the decrypted copy must not outlive it
+            for suffix in ("-wal", "-shm"):
+                Path(temp_db_file.name + suffix).unlink(missing_ok=True)
 
     ctx.call_on_close(cleanup)
 
@@ -89,79 +119,59 @@ app.add_typer(filters_app.app, name="filters")
 app.add_typer(tables.app, name="tables")
 
 
-# define command entrypoints that call methods on the instantiated classes
+# define command entrypoints, the command classes are imported on first use
 @app.command()
 def extract(
     ctx: Context,
-    file_path: Annotated[
-        Path,
-        typer.Argument(
-            exists=True,
-            file_okay=True,
-            dir_okay=False,
-            writable=False,
-            readable=True,
-            resolve_path=True,
-        ),
-    ],
-    encoding: Annotated[str, typer.Option(help="encoding of the csv file")] = "utf-8",
+    file_path: Annotated[Path, CSV_FILE_ARG],
+    encoding: Annotated[str, ENCODING_OPT] = "utf-8",
 ):
     """extract data from a csv file and load it into a new table"""
-    cmd = ExtractCommand(ctx.obj["storage"], ctx.obj["settings"])
-    cmd.run(file_path=file_path, encoding=encoding)
+    _run_command("extract", ctx, file_path=file_path, encoding=encoding)
 
 
 @app.command()
 def delete(
     ctx: Context,
-    table_name: Annotated[str, typer.Argument(help="the name of the table to delete")],
+    table_name: Annotated[str, DELETE_TABLE_ARG],
+    yes: Annotated[bool, YES_OPT] = False,
 ):
     """delete a table from the database"""
-    cmd = DeleteCommand(ctx.obj["storage"], ctx.obj["settings"])
-    cmd.run(table_name=table_name)
+    _run_command("delete", ctx, table_name=table_name, yes=yes)
 
 
 @app.command()
-def purge(ctx: Context):
+def purge(
+    ctx: Context,
+    yes: Annotated[bool, YES_OPT] = False,
+):
     """delete all tables from the database"""
-    cmd = PurgeCommand(ctx.obj["storage"], ctx.obj["settings"])
-    cmd.run()
+    _run_command("purge", ctx, yes=yes)
 
 
 @app.command()
 def sql(
     ctx: Context,
-    query: Annotated[str, typer.Argument(help="the sql query to execute")],
+    query: Annotated[str, QUERY_ARG],
 ):
     """execute a raw sql query on the database"""
-    cmd = SqlCommand(ctx.obj["storage"], ctx.obj["settings"])
-    cmd.run(query=query)
+    _run_command("sql", ctx, query=query)
 
 
 @app.command()
 def export(
     ctx: Context,
-    table_names: Annotated[
-        list[str] | None,
-        typer.Argument(help="the name of the table(s) to export"),
-    ] = None,
+    table_names: Annotated[list[str] | None, EXPORT_TABLES_ARG] = None,
 ):
     """export one or more tables to csv files"""
-    cmd = ExportCommand(ctx.obj["storage"], ctx.obj["settings"])
-    cmd.run(table_names=table_names)
+    _run_command("export", ctx, table_names=table_names)
 
 
 @app.command()
 def search(
     ctx: Context,
-    value: Annotated[str, typer.Argument(help="the value to search for")],
-    targets: Annotated[
-        list[str] | None,
-        typer.Argument(
-            help="optional list of targets to search in (e.g., 'table1', 'table2.col1', '*.col2')"
-        ),
-    ] = None,
+    value: Annotated[str, SEARCH_VALUE_ARG],
+    targets: Annotated[list[str] | None, SEARCH_TARGETS_ARG] = None,
 ):
     """search for a value in the database"""
-    cmd = SearchCommand(ctx.obj["storage"], ctx.obj["settings"])
-    cmd.run(value=value, targets=targets)
+    _run_command("search", ctx, value=value, targets=targets)
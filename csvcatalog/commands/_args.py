@@ -0,0 +1,21 @@
+"""argument and option definitions shared by the app entrypoints and the command classes"""
+
+import typer
+
+CSV_FILE_ARG = typer.Argument(
+    exists=True,
+    file_okay=True,
+    dir_okay=False,
+    writable=False,
+    readable=True,
+    resolve_path=True,
+)
+ENCODING_OPT = typer.Option(help="encoding of the csv file")
+DELETE_TABLE_ARG = typer.Argument(help="the name of the table to delete")
+EXPORT_TABLES_ARG = typer.Argument(help="the name of the table(s) to export")
+QUERY_ARG = typer.Argument(help="the sql query to execute")
+SEARCH_VALUE_ARG = typer.Argument(help="the value to search for")
+SEARCH_TARGETS_ARG = typer.Argument(
+    help="optional list of targets to search in (e.g., 'table1', 'table2.col1', '*.col2')"
+)
+YES_OPT = typer.Option("--yes", "-y", help="skip the confirmation prompt")
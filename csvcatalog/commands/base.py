@@ -1,12 +1,14 @@
+import functools
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
 
 import typer
-from rich.console import Console
 
+from .._console import get_console
 from ..config import Settings
-from ..storage import BaseStorage
 
-console = Console()
+if TYPE_CHECKING:
+    from ..storage import BaseStorage
 
 
 class CommandBase(ABC):
@@ -14,22 +16,42 @@ class CommandBase(ABC):
     an abstract base class for commands
     """
 
-    def __init__(self, storage: BaseStorage, settings: Settings):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # wrap each concrete execute in the error handler once, at class creation
+        if "execute" in cls.__dict__:
+            cls.execute = CommandBase._handle_errors(cls.__dict__["execute"])
+
+    def __init__(self, storage: "BaseStorage", settings: Settings):
         self.storage = storage
         self.settings = settings
 
+    @staticmethod
+    def _handle_errors(execute):
+        """
+        wraps the command logic in a generic error handler
+        """
+
+        @functools.wraps(execute)
+        def wrapper(*args, **kwargs):
+            try:
+                return execute(*args, **kwargs)
+            except typer.Abort:
+                # re-raise abort exceptions to let typer handle them
+                raise
+            except Exception as e:
+                get_console().print(
+                    f"[bold red]an unexpected error occurred: {e}[/bold red]"
+                )
+                raise typer.Abort() from e
+
+        return wrapper
+
     def run(self, *args, **kwargs):
         """
-        method called by typer. wraps the command logic in a generic error handler
+        method called by typer, execute is already wrapped in the error handler
         """
-        try:
-            return self.execute(*args, **kwargs)
-        except typer.Abort:
-            # re-raise abort exceptions to let typer handle them
-            raise
-        except Exception as e:
-            console.print(f"[bold red]an unexpected error occurred: {e}[/bold red]")
-            raise typer.Abort() from e
+        return self.execute(*args, **kwargs)
 
     @abstractmethod
     def execute(self, *args, **kwargs):
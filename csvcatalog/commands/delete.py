@@ -1,32 +1,30 @@
 from typing import Annotated
 
-import questionary
 import typer
-from rich.console import Console
 
+from .. import utils
+from .._console import get_console
+from ._args import DELETE_TABLE_ARG, YES_OPT
 from .base import CommandBase
 
-console = Console()
-
 
 class DeleteCommand(CommandBase):
     def execute(
         self,
-        table_name: Annotated[
-            str, typer.Argument(help="the name of the table to delete")
-        ],
+        table_name: Annotated[str, DELETE_TABLE_ARG],
+        yes: Annotated[bool, YES_OPT] = False,
     ):
         """delete a table"""
         # check if table exists first
         if not self.storage.get_table(table_name):
-            console.print(f"[red]error: table '{table_name}' not found[/red]")
+            get_console().print(f"[red]error: table '{table_name}' not found[/red]")
             raise typer.Abort()
 
-        if not questionary.confirm(
+        if not utils.confirm_destructive(
             f"are you sure you want to delete table '{table_name}'?",
-            default=False,
-        ).ask():
+            assume_yes=yes,
+        ):
             raise typer.Abort()
 
         self.storage.delete_table(table_name)
-        console.print(f"[green]table '{table_name}' deleted successfully[/green]")
+        get_console().print(f"[green]table '{table_name}' deleted successfully[/green]")
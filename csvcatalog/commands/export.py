@@ -1,24 +1,146 @@
+import contextlib
 import csv
+import itertools
+import multiprocessing
+import os
+import queue
+import re
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from typing import Annotated, Any
 
 import questionary
 import typer
 from questionary import Choice
-from rich.console import Console
 from rich.markup import escape
 
-from .. import utils
+from .. import storage, utils
+from .._console import get_console
+from ..config import Settings
+from ._args import EXPORT_TABLES_ARG
 from .base import CommandBase
 
-console = Console()
+
+def _literal_condition(column: str, regex: str) -> tuple[str, str] | None:
+    """returns an sql condition and its parameter equivalent to REGEXP for plain
+    substring and prefix patterns, sqlite evaluates these without calling into python"""
+    literal_pattern = utils.split_literal_pattern(regex)
+    if literal_pattern is None:
+        return None
+    kind, literal = literal_pattern
+    if kind == "prefix":
+        return f"substr({column}, 1, {len(literal)}) = ?", literal
+    if kind == "contains":
+        return f"instr({column}, ?) > 0", literal
+    return None
+
+
+def _filter_batches(
+    batches: Iterator[list[tuple[Any, ...]]],
+    tests: list[tuple[int, Callable[[str], Any]]],
+    limit: int,
+) -> Iterator[list[tuple[Any, ...]]]:
+    """keeps rows whose columns match every (position, search) test, up to limit rows"""
+    remaining = limit
+    for rows in batches:
+        kept = [
+            row
+            for row in rows
+            if all(row[i] is not None and search(str(row[i])) for i, search in tests)
+        ]
+        if remaining != -1:
+            kept = kept[:remaining]
+            remaining -= len(kept)
+        if kept:
+            yield kept
+        if remaining == 0:
+            return
+
+
+def _export_worker(
+    database_path: Path, settings: Settings, export_config: dict[str, Any]
+) -> list[str]:
+    """
+    runs a single table export in a worker process with its own read-only connection
+    returns the status lines instead of printing them so the parent can print them in table order
+    """
+    messages: list[str] = []
+    storage_instance = storage.SqliteStorage(database_path, read_only=True)
+    try:
+        ExportCommand(storage_instance, settings)._execute_export(
+            export_config, echo=messages.append
+        )
+    finally:
+        storage_instance.close()
+    return messages
+
+
+# marks the end of the batches produced by a prefetch thread
+_END_OF_BATCHES = object()
+
+
+def _prefetch(
+    batches: Iterator[list[tuple[Any, ...]]], depth: int = 4
+) -> Iterator[list[tuple[Any, ...]]]:
+    """pulls batches on a background thread so fetching the next one overlaps writing this one"""
+    buffer: queue.Queue[Any] = queue.Queue(depth)
+    stopped = threading.Event()
+
+    def offer(item: Any) -> bool:
+        """waits for room in the buffer, returns false if the consumer went away"""
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for batch in batches:
+                if not offer(batch):
+                    return
+            offer(_END_OF_BATCHES)
+        except BaseException as e:  # handed to the consumer and raised there
+            offer(e)
+        finally:
+            # release what the source holds, such as a pooled connection
+            close = getattr(batches, "close", None)
+            if close is not None:
+                close()
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while (item := buffer.get()) is not _END_OF_BATCHES:
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+        # unblock a producer waiting for room so it can see the stop flag
+        with contextlib.suppress(queue.Empty):
+            while True:
+                buffer.get_nowait()
+        producer.join()
 
 
 class ExportCommand(CommandBase):
+    # rows fetched from the database per write
+    BATCH_SIZE = 10_000
+    # tables up to this size are filtered in python instead of with sql REGEXP
+    PYTHON_FILTER_MAX_ROWS = 100_000
+    # bulk exports of fewer rows than this stay in-process, a worker costs a fresh interpreter
+    PARALLEL_MIN_ROWS = 200_000
+
     def _configure_table_for_export(self, table_name: str) -> dict[str, Any]:
         """runs the full interactive configuration for exporting a single table"""
         table = self.storage.get_table(table_name)
         if not table:
-            console.print(f"[red]table '{table_name}' not found[/red]")
+            get_console().print(f"[red]table '{table_name}' not found[/red]")
             raise typer.Abort()
 
         # 1. select columns
@@ -28,16 +150,14 @@ class ExportCommand(CommandBase):
             choices=col_choices,
         ).ask()
         if not columns_to_export:
-            console.print("[red]no columns selected, aborting[/red]")
+            get_console().print("[red]no columns selected, aborting[/red]")
             raise typer.Abort()
 
         # 2. define filters
         filters = utils.prompt_for_filters(columns_to_export, self.settings)
 
         # 3. ask for unique rows
-        export_distinct = questionary.confirm(
-            "export only unique rows?", default=False
-        ).ask()
+        export_distinct = utils.confirm("export only unique rows?")
 
         # 4. get limit
         limit_str = questionary.text(
@@ -54,7 +174,7 @@ class ExportCommand(CommandBase):
                 if limit < 0:
                     raise ValueError
             except ValueError:
-                console.print("[red]invalid input, using 'all'[/red]")
+                get_console().print("[red]invalid input, using 'all'[/red]")
                 limit = -1
 
         # 5. get filename
@@ -64,7 +184,7 @@ class ExportCommand(CommandBase):
         ).ask()
         if not output_filename:
             output_filename = default_filename
-        if not output_filename.lower().endswith(".csv"):
+        if os.path.splitext(output_filename)[1].lower() != ".csv":
             output_filename += ".csv"
 
         return {
@@ -76,8 +196,16 @@ class ExportCommand(CommandBase):
             "output_filename": output_filename,
         }
 
-    def _execute_export(self, export_config: dict[str, Any]):
-        """executes the export query and writes the results to a csv file"""
+    def _execute_export(
+        self,
+        export_config: dict[str, Any],
+        echo: Callable[[str], None] | None = None,
+    ) -> None:
+        """
+        executes the export query and writes the results to a csv file
+        progress and status lines go to echo, the shared console by default
+        """
+        echo = echo or get_console().print
         table_name = export_config["table_name"]
         columns_to_export = export_config["columns"]
         filters = export_config["filters"]
@@ -87,52 +215,128 @@ class ExportCommand(CommandBase):
 
         # build query
         select_keyword = "SELECT DISTINCT" if export_distinct else "SELECT"
-        columns_str = ", ".join(f'"{c}"' for c in columns_to_export)
-        query = f'{select_keyword} {columns_str} FROM "{table_name}"'
+        columns_str = storage.quote_columns(tuple(columns_to_export))
+        query = f"{select_keyword} {columns_str} FROM {storage.quote_identifier(table_name)}"
         params = []
 
+        # small tables are fetched whole and filtered with patterns compiled once,
+        # skipping the per-row REGEXP callback, larger tables filter and limit in sql
+        table = self.storage.get_table(table_name)
+        filter_in_python = (
+            bool(filters)
+            and table is not None
+            and table.count <= self.PYTHON_FILTER_MAX_ROWS
+            and all(col in columns_to_export for col in filters)
+        )
+
+        tests = []
         if filters:
-            console.print(f"\n[bold]filters for '{table_name}':[/bold]")
+            echo(f"\n[bold]filters for '{table_name}':[/bold]")
             where_clauses = []
             for col, patterns in filters.items():
                 for regex in patterns:
-                    console.print(
+                    echo(
                         f"  - [cyan]{col}[/cyan] -> [magenta]'{escape(regex)}'[/magenta]"
                     )
-                    where_clauses.append(f'"{col}" REGEXP ?')
-                    params.append(regex)
-            query += " WHERE " + " AND ".join(where_clauses)
+                    if filter_in_python:
+                        position = columns_to_export.index(col)
+                        try:
+                            tests.append((position, utils.compile_filter_test(regex)))
+                        except re.error as e:
+                            # skip this table only, bulk export carries on with the rest
+                            echo(
+                                f"[red]error during export of '{output_filename}': {e}[/red]"
+                            )
+                            return
+                        continue
+                    quoted_col = storage.quote_identifier(col)
+                    literal = _literal_condition(quoted_col, regex)
+                    if literal:
+                        clause, param = literal
+                    else:
+                        clause, param = f"{quoted_col} REGEXP ?", regex
+                    where_clauses.append(clause)
+                    params.append(param)
+            if where_clauses:
+                query += " WHERE " + " AND ".join(where_clauses)
 
-        if limit != -1:
+        if limit != -1 and not filter_in_python:
             query += f" LIMIT {limit}"
 
+        # nothing runs until the first batch is requested, the prefetch thread
+        # fetches the next batches while the current one is written
+        batches = self.storage.sql_iter(query, params, self.BATCH_SIZE)
+        if filter_in_python:
+            batches = _filter_batches(batches, tests, limit)
+        batches = _prefetch(batches)
         try:
-            results = self.storage.sql(query, params)
-            if not results:
-                console.print(
+            first_batch = next(batches, None)
+            if not first_batch:
+                echo(
                     f"[yellow]no data found for '{table_name}' with the given filters[/yellow]"
                 )
                 return
 
-            with open(output_filename, "w", newline="", encoding="utf-8") as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(columns_to_export)
-                for row in results:
-                    writer.writerow(row.values())
+            # rows go to a .tmp sibling that replaces the target only once every batch is
+            # written, so a failed export never leaves a truncated csv behind
+            output_path = Path(output_filename)
+            tmp_path = output_path.with_name(output_path.name + ".tmp")
+            total_written = 0
+            try:
+                with open(
+                    tmp_path, "w", newline="", encoding="utf-8", buffering=1 << 20
+                ) as csvfile:
+                    writer = csv.writer(csvfile)
+                    writer.writerow(columns_to_export)
+                    for rows in itertools.chain([first_batch], batches):
+                        writer.writerows(rows)
+                        total_written += len(rows)
+                tmp_path.replace(output_path)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
 
-            console.print(
-                f"[green]successfully exported {len(results)} rows to '{output_filename}'[/green]"
+            echo(
+                f"[green]successfully exported {total_written} rows to '{output_filename}'[/green]"
             )
         except Exception as e:
-            console.print(f"[red]error during export of '{output_filename}': {e}[/red]")
+            echo(f"[red]error during export of '{output_filename}': {e}[/red]")
             # no abort here to allow other tables in bulk export to continue
+        finally:
+            batches.close()
+
+    def _execute_bulk_export(self, export_configs: list[dict[str, Any]]) -> None:
+        """runs independent table exports, in parallel worker processes when the tables are large"""
+        total_rows = 0
+        for config in export_configs:
+            table = self.storage.get_table(config["table_name"])
+            total_rows += table.count if table else 0
+
+        workers = min(len(export_configs), os.cpu_count() or 1)
+        if workers < 2 or total_rows < self.PARALLEL_MIN_ROWS:
+            for config in export_configs:
+                self._execute_export(config)
+            return
+
+        # spawn rather than fork so workers never inherit the open sqlite connections
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _export_worker, self.storage.database_path, self.settings, config
+                )
+                for config in export_configs
+            ]
+            # each table's lines are printed together, in table order, as soon as
+            # that table's worker is done, so output from concurrent workers never interleaves
+            for future in futures:
+                for message in future.result():
+                    get_console().print(message)
 
     def execute(
         self,
-        table_names: Annotated[
-            list[str] | None,
-            typer.Argument(help="the name of the table(s) to export"),
-        ] = None,
+        table_names: Annotated[list[str] | None, EXPORT_TABLES_ARG] = None,
     ):
         """export one or more tables to csv files"""
         tables_to_export = table_names
@@ -140,7 +344,7 @@ class ExportCommand(CommandBase):
         if not tables_to_export:
             all_tables = self.storage.get_tables()
             if not all_tables:
-                console.print("[yellow]no tables found in database[/yellow]")
+                get_console().print("[yellow]no tables found in database[/yellow]")
                 raise typer.Abort()
 
             choices = [Choice(table.name, checked=True) for table in all_tables]
@@ -150,13 +354,13 @@ class ExportCommand(CommandBase):
             ).ask()
 
             if selected_tables is None:  # user cancelled with ctrl+c
-                console.print("[red]aborted[/red]")
+                get_console().print("[red]aborted[/red]")
                 raise typer.Abort()
 
             tables_to_export = selected_tables
 
         if not tables_to_export:
-            console.print("[red]no tables selected, aborting[/red]")
+            get_console().print("[red]no tables selected, aborting[/red]")
             raise typer.Abort()
 
         if len(tables_to_export) == 1:
@@ -168,7 +372,7 @@ class ExportCommand(CommandBase):
             for name in tables_to_export:
                 table = self.storage.get_table(name)
                 if not table:
-                    console.print(
+                    get_console().print(
                         f"[yellow]table '{name}' not found, skipping[/yellow]"
                     )
                     continue
@@ -194,18 +398,19 @@ class ExportCommand(CommandBase):
                 if table_to_configure == "[continue]":
                     break
 
-                console.print(
+                get_console().print(
                     f"\nrunning interactive setup for '{table_to_configure}'..."
                 )
                 # run the full interactive configuration for the selected table
                 new_config = self._configure_table_for_export(table_to_configure)
                 # update the configuration for that table
                 export_configs[table_to_configure] = new_config
-                console.print(
+                get_console().print(
                     f"[green]export settings for '{table_to_configure}' updated[/green]\n"
                 )
 
-            console.print(f"\nstarting bulk export for {len(export_configs)} tables...")
-            for config in export_configs.values():
-                self._execute_export(config)
-            console.print("\n[bold green]bulk export complete[/bold green]")
+            get_console().print(
+                f"\nstarting bulk export for {len(export_configs)} tables..."
+            )
+            self._execute_bulk_export(list(export_configs.values()))
+            get_console().print("\n[bold green]bulk export complete[/bold green]")
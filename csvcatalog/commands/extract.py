@@ -1,47 +1,122 @@
+import codecs
+import collections
+import contextlib
 import csv
-import re
+import itertools
+import operator
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Any, TextIO
 
 import questionary
 import typer
 from questionary import Choice
-from rich.console import Console
 from rich.markup import escape
+from rich.progress import BarColumn, Progress, TextColumn, TimeElapsedColumn
 from rich.table import Table
 
 from .. import storage, utils
+from .._console import get_console
+from ._args import CSV_FILE_ARG, ENCODING_OPT
 from .base import CommandBase
 
-console = Console()
-
 
 class ExtractCommand(CommandBase):
-    # constants for batch processing
-    BATCH_SIZE = 10_000
-
-    def _row_is_filtered_out(
-        self, row_data: dict[str, str], filters: dict[str, list[str]]
-    ) -> bool:
-        """returns true if the row should be skipped based on the defined filters"""
-        if not filters:
-            return False
-        for col, patterns in filters.items():
-            value_to_check = row_data.get(col, "")
-            # all patterns for a given column must match (and condition)
-            if not all(re.search(p, value_to_check) for p in patterns):
-                return True
-        return False
+    # read buffer for the full pass over the csv file
+    READ_BUFFER_SIZE = 1 << 20
+    # batches parsed ahead of the background save
+    SAVE_QUEUE_DEPTH = 2
+    # rows used to measure how selective and costly each filter test is
+    FILTER_SAMPLE_ROWS = 10_000
+
+    @staticmethod
+    def _project_rows(
+        rows: Iterable[list[str]], indices: list[int]
+    ) -> Iterator[tuple[str | None, ...]]:
+        """yields the selected fields of each csv row as a tuple, none for fields a short row lacks"""
+        min_len = max(indices) + 1
+        # itemgetter picks every field in one c call, it returns a bare value for a single index
+        if len(indices) == 1:
+            only = indices[0]
+
+            def project(row_parts: list[str]) -> tuple[str, ...]:
+                return (row_parts[only],)
+        else:
+            project = operator.itemgetter(*indices)
+
+        for row_parts in rows:
+            if not row_parts:
+                continue
+            if len(row_parts) >= min_len:
+                yield project(row_parts)
+                continue
+            n = len(row_parts)
+            row = tuple([row_parts[i] if i < n else None for i in indices])
+            # skip rows that have none of the selected fields
+            if any(v is not None for v in row):
+                yield row
+
+    @staticmethod
+    def _compile_filters(
+        filters: dict[str, list[str]], columns: list[str]
+    ) -> list[tuple[int, Callable[[str], Any]]]:
+        """turns {column: patterns} into (position, search) tests, every test must match"""
+        return [
+            (columns.index(col), utils.compile_filter_test(p))
+            for col, patterns in filters.items()
+            for p in patterns
+        ]
+
+    @staticmethod
+    def _order_tests(
+        tests: list[tuple[int, Callable[[str], Any]]],
+        sample: list[tuple[str | None, ...]],
+    ) -> list[tuple[int, Callable[[str], Any]]]:
+        """orders filter tests so the ones rejecting the most rows per unit of time
+        run first, measured on a sample of rows"""
+        scores = []
+        for i, search in tests:
+            start = time.perf_counter_ns()
+            rejected = sum(1 for row in sample if not search(row[i] or ""))
+            elapsed = time.perf_counter_ns() - start
+            scores.append(rejected / max(elapsed, 1))
+        order = sorted(range(len(tests)), key=lambda k: scores[k], reverse=True)
+        return [tests[k] for k in order]
+
+    @staticmethod
+    def _detect_bom_encoding(file_path: Path, encoding: str) -> str:
+        """returns utf-8-sig for utf-8 files that start with a byte order mark, so the
+        mark is not read into the first header, otherwise the given encoding"""
+        try:
+            if codecs.lookup(encoding).name != "utf-8":
+                return encoding
+            with file_path.open("rb") as f:
+                if f.read(len(codecs.BOM_UTF8)) == codecs.BOM_UTF8:
+                    return "utf-8-sig"
+        except (LookupError, OSError):
+            pass  # reported when the file is opened for the preview
+        return encoding
+
+    def _open_csv(self, file_path: Path, encoding: str) -> TextIO:
+        """opens the csv file for reading, it stays open for the whole wizard"""
+        try:
+            return file_path.open(
+                "r", encoding=encoding, newline="", buffering=self.READ_BUFFER_SIZE
+            )
+        except Exception as e:
+            raise typer.BadParameter(f"could not read file: {e}") from e
 
     def _get_csv_data(
-        self, file_path: Path, separator: str, encoding: str
+        self, f: TextIO, separator: str, encoding: str
     ) -> tuple[list[str], list[list[str]]]:
-        """helper to read csv headers and preview rows with specified encoding"""
+        """helper to read csv headers and preview rows from the start of an open file"""
         try:
-            with file_path.open("r", encoding=encoding, newline="") as f:
-                reader = csv.reader(f, delimiter=separator)
-                csv_headers = next(reader)
-                preview_rows = [row for i, row in enumerate(reader) if i < 5]
+            f.seek(0)
+            reader = csv.reader(f, delimiter=separator)
+            csv_headers = next(reader)
+            preview_rows = list(itertools.islice(reader, 5))
             return csv_headers, preview_rows
         except StopIteration:
             raise typer.BadParameter(
@@ -56,42 +131,47 @@ class ExtractCommand(CommandBase):
 
     def execute(
         self,
-        file_path: Annotated[
-            Path,
-            typer.Argument(
-                exists=True,
-                file_okay=True,
-                dir_okay=False,
-                writable=False,
-                readable=True,
-                resolve_path=True,
-            ),
-        ],
-        encoding: Annotated[
-            str, typer.Option(help="encoding of the csv file")
-        ] = "utf-8",
+        file_path: Annotated[Path, CSV_FILE_ARG],
+        encoding: Annotated[str, ENCODING_OPT] = "utf-8",
     ):
         """run interactive wizard to extract data from a csv file"""
-        console.print(f"starting extraction for '{file_path}'")
-
-        current_encoding = encoding
+        # the csv file is opened once per tried encoding and reused by every later step
+        with contextlib.ExitStack() as files:
+            self._run_wizard(files, file_path, encoding)
+
+    def _run_wizard(
+        self, files: contextlib.ExitStack, file_path: Path, encoding: str
+    ) -> None:
+        get_console().print(f"starting extraction for '{file_path}'")
+
+        current_encoding = self._detect_bom_encoding(file_path, encoding)
+        if current_encoding != encoding:
+            get_console().print(
+                f"[yellow]file starts with a utf-8 byte order mark, using '{current_encoding}'[/yellow]"
+            )
         separator = ","  # default separator, will be prompted later
         csv_headers: list[str] = []
         preview_rows: list[list[str]] = []
+        csv_file: TextIO | None = None
 
         # encoding selection and preview
         while True:
             try:
+                if csv_file is not None:
+                    csv_file.close()
+                csv_file = files.enter_context(
+                    self._open_csv(file_path, current_encoding)
+                )
                 csv_headers, preview_rows = self._get_csv_data(
-                    file_path, separator, current_encoding
+                    csv_file, separator, current_encoding
                 )
 
-                console.print(
+                get_console().print(
                     f"\n[bold]raw preview with encoding '{current_encoding}':[/bold]"
                 )
-                console.print(separator.join(csv_headers))
+                get_console().print(separator.join(csv_headers))
                 for row in preview_rows:
-                    console.print(separator.join(row))
+                    get_console().print(separator.join(row))
 
                 confirm_encoding = questionary.confirm(
                     f"is '{current_encoding}' the correct encoding for the preview?"
@@ -110,7 +190,7 @@ class ExtractCommand(CommandBase):
                     continue
                 break
             except typer.BadParameter as e:
-                console.print(f"[red]error: {e}[/red]")
+                get_console().print(f"[red]error: {e}[/red]")
                 new_encoding = questionary.text(
                     "enter new encoding (e.g., utf-8, utf-8-sig, latin-1):",
                     default=current_encoding,
@@ -122,18 +202,22 @@ class ExtractCommand(CommandBase):
         final_encoding = current_encoding
 
         # set separator
+        preview_separator = separator
         separator = questionary.text("enter csv separator:", default=separator).ask()
         if not separator:
             raise typer.Abort()
 
-        # re-read the csv data with the correct separator
-        try:
-            csv_headers, preview_rows = self._get_csv_data(
-                file_path, separator, final_encoding
-            )
-        except typer.BadParameter as e:
-            console.print(f"[red]error reading file with new separator: {e}[/red]")
-            raise typer.Abort() from e
+        # re-read the csv data if the separator changed
+        if separator != preview_separator:
+            try:
+                csv_headers, preview_rows = self._get_csv_data(
+                    csv_file, separator, final_encoding
+                )
+            except typer.BadParameter as e:
+                get_console().print(
+                    f"[red]error reading file with new separator: {e}[/red]"
+                )
+                raise typer.Abort() from e
 
         # step 3: select which csv headers to import
         choices = [Choice(header, checked=True) for header in csv_headers]
@@ -142,11 +226,11 @@ class ExtractCommand(CommandBase):
             choices=choices,
         ).ask()
         if not selected_csv_headers:
-            console.print("[red]no columns selected, aborting[/red]")
+            get_console().print("[red]no columns selected, aborting[/red]")
             raise typer.Abort()
 
         # step 4: define database column names for selected csv headers
-        console.print(
+        get_console().print(
             "\n[bold]define database column names. by default, the original csv header is used.[/bold]"
         )
         # set default mapping, sanitizing column names
@@ -183,12 +267,14 @@ class ExtractCommand(CommandBase):
 
             if not new_db_name_raw:
                 # if user enters empty string, abort or revert? for now, let's abort.
-                console.print("[red]column name cannot be empty. aborting.[/red]")
+                get_console().print("[red]column name cannot be empty. aborting.[/red]")
                 raise typer.Abort()
 
             new_db_name = storage.sanitize_identifier(new_db_name_raw)
             if new_db_name != new_db_name_raw:
-                console.print(f"[yellow]name sanitized to '{new_db_name}'[/yellow]")
+                get_console().print(
+                    f"[yellow]name sanitized to '{new_db_name}'[/yellow]"
+                )
 
             column_map[csv_header_to_edit] = new_db_name
 
@@ -219,52 +305,57 @@ class ExtractCommand(CommandBase):
             raise typer.Abort()
 
         # preview data
-        console.print("\n[bold]preview of data to be imported:[/bold]")
+        get_console().print("\n[bold]preview of data to be imported:[/bold]")
+        # resolve the csv position of every imported column once, rows are then
+        # projected into tuples ordered like columns_to_insert
         header_to_idx = {header: i for i, header in enumerate(csv_headers)}
-        data_to_preview = []
-        for line in preview_rows:
-            row_data = {}
-            for csv_header, column_name in column_map.items():
-                idx = header_to_idx.get(csv_header)
-                if idx is None or idx >= len(line):
-                    continue
-                row_data[column_name] = line[idx]
-
-            if not row_data or self._row_is_filtered_out(row_data, filters):
-                continue
-            data_to_preview.append(row_data)
+        import_set = set(columns_to_import)
+        projection = [
+            (header_to_idx[header], column_name)
+            for header, column_name in column_map.items()
+            if column_name in import_set and header in header_to_idx
+        ]
+        indices = [i for i, _ in projection]
+        columns_to_insert = [column_name for _, column_name in projection]
+        tests = self._compile_filters(filters, columns_to_insert)
+
+        data_to_preview = [
+            row
+            for row in self._project_rows(preview_rows, indices)
+            if all(search(row[i] or "") for i, search in tests)
+        ]
 
         if data_to_preview:
             table = Table(show_header=True, header_style="bold magenta")
-            for col in columns_to_import:
+            for col in columns_to_insert:
                 table.add_column(col)
             for row in data_to_preview:
-                table.add_row(*(row.get(col, "") for col in columns_to_import))
-            console.print(table)
+                table.add_row(*(v or "" for v in row))
+            get_console().print(table)
         else:
-            console.print(
+            get_console().print(
                 "[yellow]no data to preview (all 5 preview rows were filtered out)[/yellow]"
             )
 
         # summary
-        console.print("\n[bold]summary[/bold]")
-        console.print(f"  file:       {file_path}")
-        console.print(f"  table:      {table_name}")
-        console.print(
+        get_console().print("\n[bold]summary[/bold]")
+        get_console().print(f"  file:       {file_path}")
+        get_console().print(f"  table:      {table_name}")
+        get_console().print(
             f"  description:{description if description != 'no' else '[grey50]noription[/grey50]'} "
         )
-        console.print(f"  separator:  '{separator}'")
-        console.print(f"  columns:    {', '.join(columns_to_import)}")
-        console.print("[bold]column mapping:[/bold]")
+        get_console().print(f"  separator:  '{separator}'")
+        get_console().print(f"  columns:    {', '.join(columns_to_import)}")
+        get_console().print("[bold]column mapping:[/bold]")
         for csv_h, db_f in column_map.items():
-            console.print(f"  - '{csv_h}' -> '{db_f}'")
+            get_console().print(f"  - '{csv_h}' -> '{db_f}'")
         if filters:
-            console.print(
+            get_console().print(
                 "[bold]filters to apply (only matching rows will be imported):[/bold]"
             )
             for col, patterns in filters.items():
                 for regex in patterns:
-                    console.print(
+                    get_console().print(
                         f"  - [cyan]{col}[/cyan] must match regex -> [magenta]'{escape(regex)}'[/magenta]"
                     )
 
@@ -273,50 +364,76 @@ class ExtractCommand(CommandBase):
             raise typer.Abort()
 
         # extraction
-        console.print("starting extraction...")
+        get_console().print("starting extraction...")
         self.storage.create_table(table_name, columns_to_import)
         if description != "no":
             self.storage.update_description(table_name, description)
 
-        with file_path.open("r", encoding=final_encoding, newline="") as f:
+        csv_file.seek(0)
+        progress = Progress(
+            TextColumn("  saving"),
+            BarColumn(),
+            TextColumn("{task.fields[rows]} rows"),
+            TimeElapsedColumn(),
+            console=get_console(),
+        )
+        # batches are saved on a single background thread, in order, while the
+        # next batch is parsed
+        saver = ThreadPoolExecutor(max_workers=1)
+        with csv_file as f, progress, saver:
+            # progress follows the position in the underlying binary file
+            task = progress.add_task("extract", total=file_path.stat().st_size, rows=0)
             reader = csv.reader(f, delimiter=separator)
             next(reader)  # skip header
 
             batch = []
             total_saved = 0
             filtered_out_count = 0
-            for _, row_parts in enumerate(reader):
-                if not row_parts:
-                    continue
-
-                row_data = {}
-                for csv_header, column_name in column_map.items():
-                    idx = header_to_idx.get(csv_header)
-                    if idx is None or idx >= len(row_parts):
-                        continue
-                    row_data[column_name] = row_parts[idx]
-
-                if not row_data:
+            # local names for everything the row loop touches
+            append = batch.append
+            save = self.storage.save
+            batch_size = self.settings.extract_batch_size
+            pending: collections.deque[Future[None]] = collections.deque()
+
+            def submit(rows: list[tuple[str | None, ...]]) -> None:
+                # bound memory to the batches waiting to be saved, this also
+                # raises any error from an earlier save
+                while len(pending) >= self.SAVE_QUEUE_DEPTH:
+                    pending.popleft().result()
+                pending.append(saver.submit(save, table_name, columns_to_insert, rows))
+
+            projected = self._project_rows(reader, indices)
+            if len(tests) > 1:
+                # short-circuiting works best with the most selective, cheapest test first
+                sample = list(itertools.islice(projected, self.FILTER_SAMPLE_ROWS))
+                tests = self._order_tests(tests, sample)
+                projected = itertools.chain(sample, projected)
+
+            for row in projected:
+                for i, search in tests:
+                    if not search(row[i] or ""):
+                        break
+                else:
+                    append(row)
+                    if len(batch) >= batch_size:
+                        submit(batch)
+                        total_saved += len(batch)
+                        progress.update(
+                            task, completed=f.buffer.tell(), rows=total_saved
+                        )
+                        # the saver owns the submitted list, start a new one
+                        batch = []
+                        append = batch.append
                     continue
-
-                if self._row_is_filtered_out(row_data, filters):
-                    filtered_out_count += 1
-                    continue
-
-                batch.append(row_data)
-
-                if len(batch) < self.BATCH_SIZE:
-                    continue
-
-                self.storage.save(table_name, batch)
-                total_saved += len(batch)
-                console.print(f"  ... saved {total_saved} rows")
-                batch.clear()
+                filtered_out_count += 1
 
             if batch:
-                self.storage.save(table_name, batch)
+                submit(batch)
                 total_saved += len(batch)
+            while pending:
+                pending.popleft().result()
+            progress.update(task, completed=file_path.stat().st_size, rows=total_saved)
 
-        console.print(
+        get_console().print(
             f"[green]extraction complete. saved {total_saved} rows.[/green] ({filtered_out_count} rows filtered out)"
         )
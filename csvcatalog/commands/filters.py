@@ -1,29 +1,29 @@
 from typing import Annotated
 
 import typer
-from rich.console import Console
-from rich.table import Table
 from typer import Context
 
 from .. import config
+from .._console import get_console
 
 app = typer.Typer(
     invoke_without_command=True, help="manage saved reusable regex filters"
 )
-console = Console()
 
 
 def list_filters():
     """lists all saved filters"""
     settings = config.load_config()
     if not settings.filters:
-        console.print("[yellow]no saved filters found[/yellow]")
+        get_console().print("[yellow]no saved filters found[/yellow]")
         return
 
+    from rich.table import Table
+
     table = Table("name", "regex pattern")
     for name, pattern in settings.filters.items():
         table.add_row(name, pattern)
-    console.print(table)
+    get_console().print(table)
 
 
 @app.callback(invoke_without_command=True)
@@ -42,7 +42,7 @@ def add(
     settings = config.load_config()
     settings.filters[name] = pattern
     config.save_config(settings)
-    console.print(f"[green]filter '{name}' saved successfully[/green]")
+    get_console().print(f"[green]filter '{name}' saved successfully[/green]")
 
 
 @app.command()
@@ -54,16 +54,16 @@ def remove(
     """removes one or more saved filters"""
     settings = config.load_config()
     if not settings.filters:
-        console.print("[yellow]no saved filters to remove[/yellow]")
+        get_console().print("[yellow]no saved filters to remove[/yellow]")
         return
 
     if name:
         if name in settings.filters:
             del settings.filters[name]
             config.save_config(settings)
-            console.print(f"[green]filter '{name}' removed[/green]")
+            get_console().print(f"[green]filter '{name}' removed[/green]")
         else:
-            console.print(f"[red]filter '{name}' not found[/red]")
+            get_console().print(f"[red]filter '{name}' not found[/red]")
             raise typer.Abort()
     else:
         # interactive removal
@@ -75,13 +75,13 @@ def remove(
         ).ask()
 
         if not filters_to_remove:
-            console.print("no filters selected aborting")
+            get_console().print("no filters selected aborting")
             return
 
         for f_name in filters_to_remove:
             del settings.filters[f_name]
 
         config.save_config(settings)
-        console.print(
+        get_console().print(
             f"[green]successfully removed {len(filters_to_remove)} filter(s)[/green]"
         )
@@ -1,23 +1,25 @@
-import questionary
+from typing import Annotated
+
 import typer
-from rich.console import Console
 
+from .. import utils
+from .._console import get_console
+from ._args import YES_OPT
 from .base import CommandBase
 
-console = Console()
-
 
 class PurgeCommand(CommandBase):
     def execute(
         self,
+        yes: Annotated[bool, YES_OPT] = False,
     ):
         """clear the entire database"""
-        if not questionary.confirm(
+        if not utils.confirm_destructive(
             "are you sure you want to clear the entire database?",
-            default=False,
-        ).ask():
-            console.print("[red]aborted[/red]")
+            assume_yes=yes,
+        ):
+            get_console().print("[red]aborted[/red]")
             raise typer.Abort()
 
         self.storage.purge_database()
-        console.print("[green]database purged successfully[/green]")
+        get_console().print("[green]database purged successfully[/green]")
@@ -1,50 +1,43 @@
 import time
 from typing import Annotated
 
-import typer
-from rich.console import Console
 from rich.table import Table
 
+from .._console import get_console
+from ._args import SEARCH_TARGETS_ARG, SEARCH_VALUE_ARG
 from .base import CommandBase
 
-console = Console()
-
 
 class SearchCommand(CommandBase):
     def execute(
         self,
-        value: Annotated[str, typer.Argument(help="the value to search for")],
-        targets: Annotated[
-            list[str] | None,
-            typer.Argument(
-                help="optional list of targets to search in (e.g., 'table1', 'table2.col1', '*.col2')"
-            ),
-        ] = None,
+        value: Annotated[str, SEARCH_VALUE_ARG],
+        targets: Annotated[list[str] | None, SEARCH_TARGETS_ARG] = None,
     ):
         """search for a value in specified tables/columns or globally"""
         targets = targets if targets is not None else []
         start_time = time.time()
-        console.print(f"searching for '{value}'...")
-
-        results = self.storage.search(value, targets)
+        get_console().print(f"searching for '{value}'...")
+
+        # each table is printed as soon as its matches arrive
+        total_matches = 0
+        for table_name, columns, rows in self.storage.search(value, targets):
+            total_matches += len(rows)
+            get_console().print(
+                f"\nfound {len(rows)} match(es) in table '{table_name}':"
+            )
+            rich_table = Table(show_header=True, header_style="bold magenta")
+            for col in columns:
+                rich_table.add_column(col)
+            for row in rows:
+                rich_table.add_row(*map(str, row))
+            get_console().print(rich_table)
         duration = time.time() - start_time
 
-        if not results:
-            console.print("no matches found")
+        if not total_matches:
+            get_console().print("no matches found")
             return
 
-        total_matches = sum(len(rows) for rows in results.values())
-        console.print(
-            f"found {total_matches} total match(es) in {duration:.4f} seconds"
+        get_console().print(
+            f"\nfound {total_matches} total match(es) in {duration:.4f} seconds"
         )
-
-        for table_name, rows in results.items():
-            console.print(f"\nfound {len(rows)} match(es) in table '{table_name}':")
-            rich_table = Table(show_header=True, header_style="bold magenta")
-            if not rows:
-                continue
-            for col in rows[0].keys():
-                rich_table.add_column(col)
-            for row in rows:
-                rich_table.add_row(*(str(v) for v in row.values()))
-            console.print(rich_table)
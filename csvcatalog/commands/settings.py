@@ -1,20 +1,26 @@
 from pathlib import Path
 from typing import Annotated
 
-import questionary
 import typer
-from rich.console import Console
-from rich.table import Table
 from typer import Context
 
-from .. import config, crypto
+from .. import config
+from .._console import get_console
 
 app = typer.Typer(invoke_without_command=True)
-console = Console()
+
+
+def _get_settings(ctx: Context) -> config.Settings:
+    """returns the settings already loaded by the app callback, or loads them"""
+    if ctx.obj and "settings" in ctx.obj:
+        return ctx.obj["settings"]
+    return config.load_config()
 
 
 def _show_settings():
     """loads and displays current settings"""
+    from rich.table import Table
+
     settings = config.load_config()
     table = Table("setting", "value")
     db_path_str = (
@@ -23,7 +29,8 @@ def _show_settings():
     encryption_str = "[green]on[/green]" if settings.encryption else "[red]off[/red]"
     table.add_row("db_path", db_path_str)
     table.add_row("encryption", encryption_str)
-    console.print(table)
+    table.add_row("extract_batch_size", str(settings.extract_batch_size))
+    get_console().print(table)
 
 
 @app.callback(invoke_without_command=True)
@@ -45,10 +52,24 @@ def dbfile(
     db_path: Annotated[Path, typer.Argument(help="path to the database file")],
 ):
     """set the path to the database file"""
-    settings = config.load_config()
+    settings = _get_settings(ctx)
     settings.db_path = db_path
     config.save_config(settings)
-    console.print(f"database path set to: {db_path.resolve()}")
+    get_console().print(f"database path set to: {db_path.resolve()}")
+
+
+@app.command()
+def batchsize(
+    ctx: typer.Context,
+    size: Annotated[
+        int, typer.Argument(min=1, help="rows saved per batch during extract")
+    ],
+):
+    """set how many rows extract saves per batch"""
+    settings = _get_settings(ctx)
+    settings.extract_batch_size = size
+    config.save_config(settings)
+    get_console().print(f"extract batch size set to: {size}")
 
 
 @app.command()
@@ -57,47 +78,51 @@ def encryption(
     enable: Annotated[bool, typer.Argument(help="enable or disable encryption")],
 ):
     """enable or disable database encryption"""
-    settings = config.load_config()
+    settings = _get_settings(ctx)
     if settings.encryption == enable:
         status = "enabled" if enable else "disabled"
-        console.print(f"encryption is already {status}")
+        get_console().print(f"encryption is already {status}")
         return
 
     db_path = settings.db_path
     if not db_path:
-        console.print(
+        get_console().print(
             "[red]error: database path is not set, use 'settings dbfile' first[/red]"
         )
         raise typer.Abort()
 
     if not db_path.exists():
-        console.print(
+        get_console().print(
             f"database file '{db_path}' does not exist yet, saving encryption setting"
         )
         settings.encryption = enable
         config.save_config(settings)
         status = "enabled" if enable else "disabled"
-        console.print(f"encryption {status}, a password will be required on next use")
+        get_console().print(
+            f"encryption {status}, a password will be required on next use"
+        )
         return
 
-    password = questionary.password("please enter the password for the database:").ask()
+    from .. import crypto, utils
+
+    password = utils.ask_password("please enter the password for the database:")
     if not password:
-        console.print("[yellow]operation cancelled[/yellow]")
+        get_console().print("[yellow]operation cancelled[/yellow]")
         raise typer.Abort()
 
     try:
         if enable:
-            console.print(f"encrypting '{db_path}'...")
+            get_console().print(f"encrypting '{db_path}'...")
             crypto.encrypt_file(db_path, password)
-            console.print("[green]encryption successful[/green]")
+            get_console().print("[green]encryption successful[/green]")
         else:
-            console.print(f"decrypting '{db_path}'...")
+            get_console().print(f"decrypting '{db_path}'...")
             crypto.decrypt_file(db_path, password)
-            console.print("[green]decryption successful[/green]")
+            get_console().print("[green]decryption successful[/green]")
 
         settings.encryption = enable
         config.save_config(settings)
 
     except ValueError as e:
-        console.print(f"[red]error: {e}[/red]")
+        get_console().print(f"[red]error: {e}[/red]")
         raise typer.Abort() from e
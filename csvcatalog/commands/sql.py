@@ -1,28 +1,32 @@
+import contextlib
 from typing import Annotated
 
-import typer
-from rich.console import Console
 from rich.table import Table
 
+from .._console import get_console
+from ._args import QUERY_ARG
 from .base import CommandBase
 
-console = Console()
-
 
 class SqlCommand(CommandBase):
     def execute(
         self,
-        query: Annotated[str, typer.Argument(help="the sql query to execute")],
+        query: Annotated[str, QUERY_ARG],
     ):
         """execute sql command"""
-        results = self.storage.sql(query)
-        if not results:
-            console.print("[yellow]query returned no results[/yellow]")
-            return
+        # rows are stringified batch by batch, so only one batch of raw values is alive at a time
+        # closing the stream on a rendering error rolls the query back right away
+        table = None
+        with contextlib.closing(self.storage.sql_stream(query)) as batches:
+            for batch in batches:
+                if table is None:
+                    table = Table(show_header=True, header_style="bold magenta")
+                    for col in batch.columns:
+                        table.add_column(col)
+                for row in batch.rows:
+                    table.add_row(*map(str, row))
 
-        table = Table(show_header=True, header_style="bold magenta")
-        for col in results[0].keys():
-            table.add_column(col)
-        for row in results:
-            table.add_row(*(str(v) for v in row.values()))
-        console.print(table)
+        if table is None:
+            get_console().print("[yellow]query returned no results[/yellow]")
+            return
+        get_console().print(table)
@@ -1,20 +1,17 @@
 import datetime
 from enum import Enum
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated
 
-import questionary
 import typer
-from questionary import Choice
-from rich.console import Console
-from rich.table import Table
 from typer import Context
 
-from .. import storage
-from ..storage import Table as DbTable
+from .._console import get_console
 from .base import CommandBase
 
+if TYPE_CHECKING:
+    from ..storage import Table as DbTable
+
 app = typer.Typer(help="interact with tables")
-console = Console()
 
 
 class SortOption(str, Enum):
@@ -40,9 +37,13 @@ class TablesListCommand(CommandBase):
         )
 
         if not tables:
-            console.print("[yellow]no tables found matching the criteria[/yellow]")
+            get_console().print(
+                "[yellow]no tables found matching the criteria[/yellow]"
+            )
             return
 
+        from rich.table import Table
+
         # display tables
         rich_table = Table(
             title="available tables",
@@ -55,22 +56,22 @@ class TablesListCommand(CommandBase):
         rich_table.add_column("row count", justify="right")
         rich_table.add_column("created at")
 
-        for table in tables:  # sorting is now done in db
-            created_at_str = table.created_at.split("T")[0]
+        # sorting is now done in db
+        for table in tables:
             rich_table.add_row(
                 table.name,
                 table.description or "[grey50]n/a[/grey50]",
-                ", ".join(table.columns),
+                table.columns_joined,
                 str(table.count),
-                created_at_str,
+                table.created_at_date,
             )
 
-        console.print(rich_table)
+        get_console().print(rich_table)
 
         # footer
         total_tables = len(tables)
         total_rows = sum(t.count for t in tables)
-        console.print(
+        get_console().print(
             f"found [bold cyan]{total_tables}[/bold cyan] table(s) with a total of [bold cyan]{total_rows:,}[/bold cyan] rows."
         )
 
@@ -117,7 +118,7 @@ def list_tables(
         try:
             datetime.datetime.strptime(date, "%Y-%m-%d")
         except ValueError:
-            console.print("[red]invalid date format. please use yyyy-mm-dd[/red]")
+            get_console().print("[red]invalid date format. please use yyyy-mm-dd[/red]")
             raise typer.Abort() from None
 
     cmd = TablesListCommand(ctx.obj["storage"], ctx.obj["settings"])
@@ -132,10 +133,13 @@ def list_tables(
 class TablesEditCommand(CommandBase):
     def execute(self, table_name: str | None):
         """interactive wizard to edit table metadata"""
+        import questionary
+        from questionary import Choice
+
         if not table_name:
             tables = self.storage.get_tables()
             if not tables:
-                console.print("[yellow]no tables found to edit[/yellow]")
+                get_console().print("[yellow]no tables found to edit[/yellow]")
                 return
 
             table_choices = [
@@ -150,7 +154,7 @@ class TablesEditCommand(CommandBase):
 
         table = self.storage.get_table(table_name)
         if not table:
-            console.print(f"[red]error: table '{table_name}' not found[/red]")
+            get_console().print(f"[red]error: table '{table_name}' not found[/red]")
             raise typer.Abort()
 
         edit_choice = questionary.select(
@@ -158,9 +162,7 @@ class TablesEditCommand(CommandBase):
             choices=[
                 Choice("name", value="name"),
                 Choice("description", value="description"),
-                Choice(
-                    f"date (current: {table.created_at.split('T')[0]})", value="date"
-                ),
+                Choice(f"date (current: {table.created_at_date})", value="date"),
             ],
         ).ask()
 
@@ -174,48 +176,56 @@ class TablesEditCommand(CommandBase):
         elif edit_choice == "date":
             self._edit_date(table)
 
-    def _edit_name(self, table: DbTable):
+    def _edit_name(self, table: "DbTable"):
+        import questionary
+
+        from .. import storage
+
         new_name_raw = questionary.text(
             "enter new table name:", default=table.name
         ).ask()
         if not new_name_raw or new_name_raw == table.name:
-            console.print("[yellow]name not changed[/yellow]")
+            get_console().print("[yellow]name not changed[/yellow]")
             return
 
         new_name = storage.sanitize_identifier(new_name_raw)
         if new_name != new_name_raw:
-            console.print(f"[yellow]name sanitized to '{new_name}'[/yellow]")
+            get_console().print(f"[yellow]name sanitized to '{new_name}'[/yellow]")
 
         if self.storage.get_table(new_name):
-            console.print(f"[red]error: table '{new_name}' already exists[/red]")
+            get_console().print(f"[red]error: table '{new_name}' already exists[/red]")
             raise typer.Abort()
 
         self.storage.rename_table(old_name=table.name, new_name=new_name)
-        console.print(
+        get_console().print(
             f"[green]table '{table.name}' was successfully renamed to '{new_name}'[/green]"
         )
 
-    def _edit_description(self, table: DbTable):
+    def _edit_description(self, table: "DbTable"):
+        import questionary
+
         new_description = questionary.text(
             "enter new description:", default=table.description or ""
         ).ask()
         if new_description is None or new_description == table.description:
-            console.print("[yellow]description not changed[/yellow]")
+            get_console().print("[yellow]description not changed[/yellow]")
             return
 
         self.storage.update_description(table.name, new_description)
-        console.print(
+        get_console().print(
             f"[green]description for table '{table.name}' was successfully updated[/green]"
         )
 
-    def _edit_date(self, table: DbTable):
-        current_date_str = table.created_at.split("T")[0]
+    def _edit_date(self, table: "DbTable"):
+        import questionary
+
+        current_date_str = table.created_at_date
         new_date_str = questionary.text(
             "enter new date (yyyy-mm-dd):", default=current_date_str
         ).ask()
 
         if not new_date_str or new_date_str == current_date_str:
-            console.print("[yellow]date not changed[/yellow]")
+            get_console().print("[yellow]date not changed[/yellow]")
             return
 
         try:
@@ -232,11 +242,11 @@ class TablesEditCommand(CommandBase):
                 new_datetime = new_date
 
             self.storage.update_created_at(table.name, new_datetime.isoformat())
-            console.print(
+            get_console().print(
                 f"[green]date for table '{table.name}' was successfully updated[/green]"
             )
         except ValueError:
-            console.print("[red]invalid date format. please use yyyy-mm-dd[/red]")
+            get_console().print("[red]invalid date format. please use yyyy-mm-dd[/red]")
             raise typer.Abort() from None
 
 
@@ -1,8 +1,8 @@
-import json
+import functools
+import os
 from pathlib import Path
 
-from platformdirs import user_data_dir
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, Field, ValidationError
 
 
 class Settings(BaseModel):
@@ -11,12 +11,50 @@ class Settings(BaseModel):
     db_path: Path | None = None
     encryption: bool = False
     filters: dict[str, str] = {}
+    # rows per storage.save during extract, once rows are short the per-save
+    # round trip dominates, so larger batches amortize it
+    extract_batch_size: int = Field(default=50_000, gt=0)
 
 
+# remembers the resolved data directory so platformdirs is only needed on the first run
+DATA_DIR_POINTER = Path.home() / ".csvcatalog_datadir"
+
+
+def _read_data_dir_pointer() -> Path | None:
+    """returns the data directory recorded by a previous run, if it is still valid"""
+    try:
+        xdg_data_home, _, data_dir = DATA_DIR_POINTER.read_text().partition("\n")
+    except OSError:
+        return None
+    # the pointer is stale when XDG_DATA_HOME changed or the directory is gone
+    if xdg_data_home != os.environ.get("XDG_DATA_HOME", "") or not data_dir:
+        return None
+    path = Path(data_dir)
+    return path if path.is_dir() else None
+
+
+def _write_data_dir_pointer(data_dir: Path) -> None:
+    try:
+        DATA_DIR_POINTER.write_text(
+            f"{os.environ.get('XDG_DATA_HOME', '')}\n{data_dir}"
+        )
+    except OSError:
+        pass  # the pointer is only a shortcut, resolving again next run is fine
+
+
+@functools.cache
 def get_data_dir() -> Path:
     """returns the application's data directory, ensuring it exists"""
+    data_dir = _read_data_dir_pointer()
+    if data_dir is not None:
+        return data_dir
+
+    from platformdirs import user_data_dir
+
     data_dir = Path(user_data_dir("csvcatalog", "tomashevich"))
-    data_dir.mkdir(parents=True, exist_ok=True)
+    if not data_dir.exists():
+        data_dir.mkdir(parents=True, exist_ok=True)
+    _write_data_dir_pointer(data_dir)
     return data_dir
 
 
@@ -25,22 +63,39 @@ def get_config_path() -> Path:
     return get_data_dir() / "settings.json"
 
 
+# settings parsed by the last load or save, keyed on the file's path and modification time
+# callers mutate what they get before saving, so only copies ever leave the cache
+_cache: tuple[Path, int, Settings] | None = None
+
+
 def load_config() -> Settings:
     """loads the settings from settings.json, returning default settings if it doesnt exist or is invalid"""
+    global _cache
     config_path = get_config_path()
-    if not config_path.exists():
+    try:
+        mtime_ns = config_path.stat().st_mtime_ns
+    except FileNotFoundError:
         return Settings()
-
-    with config_path.open("r") as f:
-        try:
-            data = json.load(f)
-            return Settings(**data)
-        except (json.JSONDecodeError, ValidationError):
-            return Settings()
+    if _cache is not None and _cache[:2] == (config_path, mtime_ns):
+        return _cache[2].model_copy(deep=True)
+    try:
+        # pydantic-core parses and validates in one rust pass, no intermediate dict
+        settings = Settings.model_validate_json(config_path.read_bytes())
+    except ValidationError:
+        settings = Settings()
+    _cache = (config_path, mtime_ns, settings)
+    return settings.model_copy(deep=True)
 
 
 def save_config(settings: Settings) -> None:
     """saves the given settings model to settings.json"""
+    global _cache
     config_path = get_config_path()
     with config_path.open("w") as f:
         f.write(settings.model_dump_json(indent=4))
+    # pre-warm the cache, the next load in this process needs no reparse
+    _cache = (
+        config_path,
+        config_path.stat().st_mtime_ns,
+        settings.model_copy(deep=True),
+    )
@@ -1,8 +1,13 @@
+import hashlib
+import os
+import stat
 import tempfile
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from pathlib import Path
+from typing import BinaryIO
 
 from Crypto.Cipher import AES
-from Crypto.Protocol.KDF import PBKDF2
 from Crypto.Random import get_random_bytes
 
 # constants for aes-256-gcm
@@ -10,43 +15,139 @@ KEY_SIZE = 32  # 256 bits
 SALT_SIZE = 16
 NONCE_SIZE = 16  # gcm standard nonce size
 TAG_SIZE = 16  # gcm standard auth tag size
-ITERATIONS = 100000
+ITERATIONS = 600_000  # pbkdf2-hmac-sha256, owasp 2023 recommendation
+LEGACY_ITERATIONS = 100_000  # pbkdf2-hmac-sha1, files written before the magic header
+MAGIC = b"CSVCAT\x02"  # marks files keyed with the sha256 kdf
+HEADER_SIZE = SALT_SIZE + NONCE_SIZE + TAG_SIZE
+CHUNK_SIZE = 1024 * 1024  # 1 MiB per streamed read
+KEY_CACHE_SIZE = 8
 
+# keys derived in this process keyed by a digest of the password, holding the last
+# salt used with it, so re-encrypting a db after decrypting it skips the kdf
+# the cache lives in memory only and is never written anywhere
+_key_cache: dict[bytes, tuple[bytes, bytes]] = {}
 
-def encrypt_file(file_path: Path, password: str) -> None:
-    """encrypts a file using aes-256-gcm"""
-    if not file_path.exists():
-        return
-    plaintext = file_path.read_bytes()
-    encrypt_bytes_to_file(plaintext, file_path, password)
 
+def _derive_key(password: str, salt: bytes, legacy: bool = False) -> bytes:
+    """derives the aes key with hashlib's openssl-backed pbkdf2"""
+    if legacy:
+        # matches pycryptodome's PBKDF2 defaults the old files were written with
+        return hashlib.pbkdf2_hmac(
+            "sha1",
+            password.encode("latin-1", errors="replace"),
+            salt,
+            LEGACY_ITERATIONS,
+            KEY_SIZE,
+        )
+    digest = hashlib.sha256(password.encode("utf-8")).digest()
+    cached = _key_cache.pop(digest, None)
+    if cached is not None and cached[0] == salt:
+        key = cached[1]
+    else:
+        key = hashlib.pbkdf2_hmac(
+            "sha256", password.encode("utf-8"), salt, ITERATIONS, KEY_SIZE
+        )
+    if len(_key_cache) >= KEY_CACHE_SIZE:
+        _key_cache.pop(next(iter(_key_cache)))
+    _key_cache[digest] = (salt, key)
+    return key
 
-def encrypt_bytes_to_file(data: bytes, file_path: Path, password: str) -> None:
-    """encrypts and writes in file"""
+
+def _encryption_key(password: str) -> tuple[bytes, bytes]:
+    """returns a salt and key to encrypt with, reusing the last derivation for this password"""
+    cached = _key_cache.get(hashlib.sha256(password.encode("utf-8")).digest())
+    if cached is not None:
+        # the gcm nonce is random per encryption, so keeping the salt is safe
+        return cached
     salt = get_random_bytes(SALT_SIZE)
-    key = PBKDF2(password, salt, dkLen=KEY_SIZE, count=ITERATIONS)
-    cipher = AES.new(key, AES.MODE_GCM)
-    ciphertext, tag = cipher.encrypt_and_digest(data)
-    nonce = cipher.nonce
-    # write salt, nonce, tag, and ciphertext to the file
-    file_path.write_bytes(salt + nonce + tag + ciphertext)
+    return salt, _derive_key(password, salt)
+
+
+def _read_header(src: BinaryIO, password: str) -> tuple[bytes, bytes, bytes]:
+    """reads the header of an encrypted file and returns the key, nonce and tag"""
+    legacy = src.read(len(MAGIC)) != MAGIC
+    if legacy:
+        src.seek(0)
+    header = src.read(HEADER_SIZE)
+    salt = header[:SALT_SIZE]
+    nonce = header[SALT_SIZE : SALT_SIZE + NONCE_SIZE]
+    tag = header[SALT_SIZE + NONCE_SIZE :]
+    return _derive_key(password, salt, legacy=legacy), nonce, tag
+
+
+def encrypt_file(file_path: Path, password: str) -> None:
+    """encrypts a file in place using aes-256-gcm, streaming it in chunks"""
+    if not file_path.exists():
+        return
+    # the source is closed before the swap, some platforms refuse to replace open files
+    with _atomic_write(file_path) as dst, file_path.open("rb") as src:
+        _encrypt_stream(src, dst, password)
 
 
 def decrypt_file(file_path: Path, password: str) -> None:
-    """decrypts a file using aes-256-gcm"""
+    """decrypts a file in place using aes-256-gcm, streaming it in chunks"""
     if not file_path.exists():
         return
-    encrypted_data = file_path.read_bytes()
-    # extract salt, nonce, tag, and ciphertext
-    salt = encrypted_data[:SALT_SIZE]
-    nonce = encrypted_data[SALT_SIZE : SALT_SIZE + NONCE_SIZE]
-    tag = encrypted_data[SALT_SIZE + NONCE_SIZE : SALT_SIZE + NONCE_SIZE + TAG_SIZE]
-    ciphertext = encrypted_data[SALT_SIZE + NONCE_SIZE + TAG_SIZE :]
-    key = PBKDF2(password, salt, dkLen=KEY_SIZE, count=ITERATIONS)
+    with _atomic_write(file_path) as dst, file_path.open("rb") as src:
+        _decrypt_stream(src, dst, password)
+
+
+@contextmanager
+def _atomic_write(file_path: Path) -> Iterator[BinaryIO]:
+    """
+    yields a .tmp file next to file_path and swaps it in once the block succeeds
+    the tmp file takes the target's permission bits before anything is written and is removed on failure
+    """
+    # swap the file a symlink points to rather than replacing the link itself
+    target = file_path.resolve()
+    tmp_path = target.with_name(target.name + ".tmp")
+    try:
+        mode = stat.S_IMODE(target.stat().st_mode)
+    except FileNotFoundError:
+        mode = 0o600
+    dst = os.fdopen(
+        os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb"
+    )
+    try:
+        with dst:
+            os.fchmod(dst.fileno(), mode)
+            yield dst
+        tmp_path.replace(target)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _pump(src: BinaryIO, dst: BinaryIO, transform: Callable[..., object]) -> None:
+    """
+    feeds src through a gcm cipher method into dst chunk by chunk
+    both buffers are allocated once and reused, pycryptodome's gcm runs on aes-ni/clmul when available
+    """
+    in_view = memoryview(bytearray(CHUNK_SIZE))
+    out_view = memoryview(bytearray(CHUNK_SIZE))
+    while size := src.readinto(in_view):
+        transform(in_view[:size], output=out_view[:size])
+        dst.write(out_view[:size])
+
+
+def _encrypt_stream(src: BinaryIO, dst: BinaryIO, password: str) -> None:
+    """encrypts a binary file object into dst chunk by chunk"""
+    salt, key = _encryption_key(password)
+    cipher = AES.new(key, AES.MODE_GCM)
+    # the tag is only known once everything is encrypted, reserve its slot for now
+    dst.write(MAGIC + salt + cipher.nonce + bytes(TAG_SIZE))
+    _pump(src, dst, cipher.encrypt)
+    dst.seek(len(MAGIC) + SALT_SIZE + NONCE_SIZE)
+    dst.write(cipher.digest())
+
+
+def _decrypt_stream(src: BinaryIO, dst: BinaryIO, password: str) -> None:
+    """decrypts an encrypted file object into dst chunk by chunk and verifies the tag"""
+    key, nonce, tag = _read_header(src, password)
     cipher = AES.new(key, AES.MODE_GCM, nonce=nonce)
     try:
-        plaintext = cipher.decrypt_and_verify(ciphertext, tag)
-        file_path.write_bytes(plaintext)
+        _pump(src, dst, cipher.decrypt)
+        cipher.verify(tag)
     except (ValueError, KeyError) as e:
         # this happens if the password is wrong or the file is corrupted/tampered with
         raise ValueError(
@@ -54,32 +155,30 @@ def decrypt_file(file_path: Path, password: str) -> None:
         ) from e
 
 
+def encrypt_stream_to_file(src: BinaryIO, file_path: Path, password: str) -> None:
+    """encrypts a binary file object in chunks and writes it to file_path"""
+    # write next to the target and swap it in, so a failure never leaves a half-written db
+    with _atomic_write(file_path) as dst:
+        _encrypt_stream(src, dst, password)
+
+
 def decrypt_file_to_temp(
     file_path: Path, password: str
 ) -> tempfile._TemporaryFileWrapper:
     """
-    decrypts a file and returns a temporary file object containing the plaintext
+    decrypts a file in chunks and returns a temporary file object containing the plaintext
     the temporary file is deleted on close
     """
+    # create a temporary file to store the decrypted database
+    temp_db = tempfile.NamedTemporaryFile(delete=True)
     if not file_path.exists():
         # return an empty temp file for new db
-        temp_db = tempfile.NamedTemporaryFile(delete=True)
-        return temp_db
-    encrypted_data = file_path.read_bytes()
-    salt = encrypted_data[:SALT_SIZE]
-    nonce = encrypted_data[SALT_SIZE : SALT_SIZE + NONCE_SIZE]
-    tag = encrypted_data[SALT_SIZE + NONCE_SIZE : SALT_SIZE + NONCE_SIZE + TAG_SIZE]
-    ciphertext = encrypted_data[SALT_SIZE + NONCE_SIZE + TAG_SIZE :]
-    key = PBKDF2(password, salt, dkLen=KEY_SIZE, count=ITERATIONS)
-    cipher = AES.new(key, AES.MODE_GCM, nonce=nonce)
-    try:
-        plaintext = cipher.decrypt_and_verify(ciphertext, tag)
-        # create a temporary file to store the decrypted database
-        temp_db = tempfile.NamedTemporaryFile(delete=True)
-        temp_db.write(plaintext)
-        temp_db.seek(0)
         return temp_db
-    except (ValueError, KeyError) as e:
-        raise ValueError(
-            "failed to decrypt file, incorrect password or corrupted file"
-        ) from e
+    with file_path.open("rb") as src:
+        try:
+            _decrypt_stream(src, temp_db, password)
+        except ValueError:
+            temp_db.close()
+            raise
+    temp_db.seek(0)
+    return temp_db
@@ -1,8 +1,34 @@
-from .app import app
+import importlib
+import sys
+
+from . import __version__
+
+# commands that can run without typer when invoked without further arguments
+FAST_COMMANDS = {
+    "settings": "csvcatalog.commands.settings:show",
+    "filters": "csvcatalog.commands.filters:list_filters",
+}
+
+
+def _fast_dispatch(argv: list[str]) -> bool:
+    """handles trivial invocations without building the typer app, returns true if handled"""
+    if argv == ["--version"]:
+        print(f"csvcatalog version: {__version__}")
+        return True
+    if len(argv) == 1 and argv[0] in FAST_COMMANDS:
+        module_name, func_name = FAST_COMMANDS[argv[0]].split(":")
+        getattr(importlib.import_module(module_name), func_name)()
+        return True
+    return False
 
 
 def main():
     """main entry point for the csv catalog cli tool"""
+    if _fast_dispatch(sys.argv[1:]):
+        return
+
+    from .app import app
+
     app()
 
 
@@ -1,8 +1,15 @@
+import functools
 import json
+import os
+import queue
 import re
 import sqlite3
+import threading
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import Any
@@ -10,6 +17,16 @@ from typing import Any
 # a simple regex to validate table/column names
 META_TABLE_NAME = "_csvcatalog_meta_"
 
+# connection pool settings, connections beyond POOL_SIZE are closed on release
+POOL_SIZE = 4
+# searches over at least this many tables run one table per thread, sqlite
+# releases the gil while stepping a LIKE scan so the tables are scanned in parallel
+SEARCH_PARALLEL_MIN_TABLES = 4
+MMAP_SIZE = 256 * 1024 * 1024
+CACHE_SIZE_KIB = 64 * 1024
+# prepared statements kept per connection, sqlite3 defaults to 128
+STATEMENT_CACHE_SIZE = 1024
+
 
 def sanitize_identifier(identifier: str) -> str:
     """replaces invalid characters with underscores to create a valid sql identifier"""
@@ -18,6 +35,17 @@ def sanitize_identifier(identifier: str) -> str:
     return identifier.replace('"', "_")
 
 
+def quote_identifier(identifier: str) -> str:
+    """quotes an identifier for use in sql, escaping embedded double quotes"""
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+@functools.lru_cache(maxsize=128)
+def quote_columns(columns: tuple[str, ...]) -> str:
+    """returns a comma separated, quoted column list, cached per column set"""
+    return ", ".join(quote_identifier(c) for c in columns)
+
+
 def _validate_identifier(identifier: str):
     """raises valueerror if the identifier is not valid and safe"""
     if '"' in identifier:
@@ -31,6 +59,193 @@ class Table:
     count: int
     created_at: str
     description: str | None
+    columns_joined: str = field(init=False, repr=False)
+    created_at_date: str = field(init=False, repr=False)
+
+    def __post_init__(self):
+        # derived once at load so listings do not rebuild them per render
+        self.columns_joined = ", ".join(self.columns)
+        self.created_at_date = self.created_at[:10]
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_regex(expr: str) -> re.Pattern:
+    """compiles a regex once per pattern instead of once per row"""
+    return re.compile(expr)
+
+
+def _regexp(expr, item):
+    if item is None:
+        return False
+    return _compile_regex(expr).search(str(item)) is not None
+
+
+# authorizer actions of statements that change the rows of a table
+_WRITE_ACTIONS = frozenset(
+    {sqlite3.SQLITE_INSERT, sqlite3.SQLITE_UPDATE, sqlite3.SQLITE_DELETE}
+)
+
+
+def _execute_tracking_writes(
+    cur: sqlite3.Cursor, query: str, params: list[Any]
+) -> set[str]:
+    """executes a raw query and returns the tables it writes to, as reported to an authorizer"""
+    written: set[str] = set()
+
+    def authorizer(action, table_name, _column, _db_name, _trigger):
+        if action in _WRITE_ACTIONS:
+            written.add(table_name)
+        return sqlite3.SQLITE_OK
+
+    # setting an authorizer expires cached statements, so the query is prepared again
+    cur.connection.set_authorizer(authorizer)
+    try:
+        cur.execute(query, params)
+    finally:
+        cur.connection.set_authorizer(None)
+    return written
+
+
+def _connect(database_path: Path, read_only: bool = False) -> sqlite3.Connection:
+    """opens a connection to the database configured for csvcatalog"""
+    if read_only:
+        con = sqlite3.connect(
+            f"{Path(database_path).resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+    else:
+        con = sqlite3.connect(
+            database_path,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+    con.row_factory = sqlite3.Row
+    # one round trip for all per-connection settings, the journal mode is
+    # persistent and can only be switched by a writer
+    journal_mode = "" if read_only else "PRAGMA journal_mode=WAL;"
+    con.executescript(
+        f"""
+        {journal_mode}
+        PRAGMA synchronous=NORMAL;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA cache_size=-{CACHE_SIZE_KIB};
+        PRAGMA mmap_size={MMAP_SIZE};
+        """
+    )
+    con.create_function("REGEXP", 2, _regexp, deterministic=True)
+    return con
+
+
+class ConnectionPool:
+    """a small pool of sqlite connections to a single database file"""
+
+    def __init__(
+        self, database_path: Path, size: int = POOL_SIZE, read_only: bool = False
+    ):
+        self.database_path = database_path
+        self.read_only = read_only
+        self.users = 0
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue(size)
+        self._open: set[sqlite3.Connection] = set()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> sqlite3.Connection:
+        """returns an idle connection, opening a new one if none is available"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            con = _connect(self.database_path, self.read_only)
+            with self._lock:
+                self._open.add(con)
+            return con
+
+    def release(self, con: sqlite3.Connection) -> None:
+        """returns a connection to the pool, closing it if the pool is full"""
+        # a failed write keeps its implicit transaction and the write lock, never hand that on
+        if con.in_transaction:
+            con.rollback()
+        try:
+            self._idle.put_nowait(con)
+        except queue.Full:
+            with self._lock:
+                self._open.discard(con)
+            con.close()
+
+    def close(self) -> None:
+        """closes every connection opened by the pool"""
+        with self._lock:
+            for con in self._open:
+                con.close()
+            self._open.clear()
+        while not self._idle.empty():
+            self._idle.get_nowait()
+
+
+# process-wide pools keyed by database path and mode, shared by every SqliteStorage
+_pools: dict[tuple[str, bool], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _open_pool(database_path: Path, read_only: bool = False) -> ConnectionPool:
+    """returns the shared pool for a database path, creating it on first use"""
+    key = (str(Path(database_path).resolve()), read_only)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(database_path, read_only=read_only)
+        pool.users += 1
+    return pool
+
+
+def _checkpoint(database_path: Path) -> None:
+    """
+    folds the wal back into the database file, when this is the last connection to it
+    closing it also removes the -wal and -shm files, which read-only connections cannot do
+    """
+    try:
+        # timeout=0 so a checkpoint never waits on another process still using the file
+        con = sqlite3.connect(database_path, timeout=0)
+        try:
+            con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            con.close()
+    except sqlite3.Error:
+        pass  # busy or not writable, whoever closes last cleans up
+
+
+def _close_pool(pool: ConnectionPool) -> None:
+    """releases one user of a pool, closing it once nobody uses it"""
+    path = str(Path(pool.database_path).resolve())
+    with _pools_lock:
+        pool.users -= 1
+        if pool.users > 0:
+            return
+        _pools.pop((path, pool.read_only), None)
+        last_pool = not any(key[0] == path for key in _pools)
+    pool.close()
+    if last_pool:
+        _checkpoint(pool.database_path)
+
+
+@dataclass
+class QueryResult:
+    """column names and plain tuple rows of a raw sql query"""
+
+    columns: list[str]
+    rows: list[tuple[Any, ...]]
+
+
+def _table_from_row(row: sqlite3.Row) -> Table:
+    """builds a table description from a metadata table row"""
+    return Table(
+        name=row["table_name"],
+        columns=json.loads(row["columns"]),
+        count=row["row_count"],
+        created_at=row["created_at"],
+        description=row["description"],
+    )
 
 
 class BaseStorage(ABC):
@@ -61,7 +276,9 @@ class BaseStorage(ABC):
     ) -> list[Table]: ...
 
     @abstractmethod
-    def save(self, table: str, data: list[dict[str, Any]]) -> None: ...
+    def save(
+        self, table: str, columns: list[str], rows: list[tuple[Any, ...]]
+    ) -> None: ...
 
     @abstractmethod
     def update_description(self, table_name: str, description: str) -> None: ...
@@ -75,12 +292,20 @@ class BaseStorage(ABC):
     @abstractmethod
     def search(
         self, value: str, targets: list[str] | None = None
-    ) -> dict[str, list[dict[str, Any]]]: ...
+    ) -> Iterator[tuple[str, list[str], list[tuple[Any, ...]]]]: ...
+
+    @abstractmethod
+    def sql(self, query: str, params: list[Any] | None = None) -> QueryResult: ...
+
+    @abstractmethod
+    def sql_stream(
+        self, query: str, params: list[Any] | None = None, batch_size: int = 10_000
+    ) -> Iterator[QueryResult]: ...
 
     @abstractmethod
-    def sql(
-        self, query: str, params: list[Any] | None = None
-    ) -> list[dict[str, Any]]: ...
+    def sql_iter(
+        self, query: str, params: list[Any] | None = None, batch_size: int = 10_000
+    ) -> Iterator[list[tuple[Any, ...]]]: ...
 
     @abstractmethod
     def close(self) -> None: ...
@@ -89,20 +314,53 @@ class BaseStorage(ABC):
 class SqliteStorage(BaseStorage):
     """manages database connection and data operations for sqlite"""
 
-    def __init__(self, database_path: Path):
+    def __init__(self, database_path: Path, read_only: bool = False):
         self._db_path = database_path
-        self.con = sqlite3.connect(database_path)
-        self.con.row_factory = sqlite3.Row
+        self.read_only = read_only
+        self._pool = _open_pool(database_path, read_only)
+        self.con = self._pool.acquire()
         self.cur = self.con.cursor()
-        self._init_meta_table()
-
-        def regexp(expr, item):
-            if item is None:
-                return False
-            reg = re.compile(expr)
-            return reg.search(str(item)) is not None
-
-        self.con.create_function("REGEXP", 2, regexp)
+        # metadata of every table keyed by name, loaded lazily and dropped on writes
+        self._tables_cache: dict[str, Table] | None = None
+        self._transaction_depth = 0
+        if not read_only:
+            self._init_meta_table()
+
+    @property
+    def database_path(self) -> Path:
+        """path of the database file this storage is connected to"""
+        return self._db_path
+
+    @contextmanager
+    def acquire(self) -> Iterator[sqlite3.Connection]:
+        """borrows a connection from the pool for the duration of the block"""
+        con = self._pool.acquire()
+        try:
+            yield con
+        finally:
+            self._pool.release(con)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """runs the block in one write transaction, committed at the end or rolled back on error
+        nested blocks join the outermost transaction"""
+        outermost = self._transaction_depth == 0
+        if outermost and not self.con.in_transaction:
+            self.cur.execute("BEGIN IMMEDIATE")
+        self._transaction_depth += 1
+        try:
+            yield
+        except BaseException:
+            self._transaction_depth -= 1
+            if outermost:
+                self.con.rollback()
+            raise
+        else:
+            self._transaction_depth -= 1
+            if outermost:
+                self.con.commit()
+        finally:
+            self._invalidate_tables_cache()
 
     def _init_meta_table(self) -> None:
         """ensures the metadata table exists"""
@@ -115,8 +373,8 @@ class SqliteStorage(BaseStorage):
             description TEXT
         )
         """
-        self.cur.execute(query)
-        self.con.commit()
+        with self.transaction():
+            self.cur.execute(query)
 
     def create_table(self, name: str, columns: list[str]) -> None:
         """creates a new table and registers it in the metadata table"""
@@ -125,51 +383,51 @@ class SqliteStorage(BaseStorage):
             _validate_identifier(col)
 
         query = f'CREATE TABLE IF NOT EXISTS "{name}" ({", ".join(f'"{c}" TEXT' for c in columns)})'
-        self.cur.execute(query)
-
         meta_query = f"""
         INSERT OR REPLACE INTO "{META_TABLE_NAME}" (table_name, columns, row_count, created_at)
-        VALUES (?, ?, 0, ?)
+        VALUES (?, ?, ?, ?)
         """
         now = datetime.utcnow().isoformat()
-        self.cur.execute(meta_query, (name, json.dumps(columns), now))
-        self.con.commit()
+        with self.transaction():
+            self.cur.execute(query)
+            # the table may already exist, start from its real size since save only adds to it
+            count = self.cur.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+            self.cur.execute(meta_query, (name, json.dumps(columns), count, now))
 
     def delete_table(self, name: str) -> None:
         """deletes a table and its metadata entry"""
         _validate_identifier(name)
-        self.cur.execute(f'DROP TABLE IF EXISTS "{name}"')
-        self.cur.execute(
-            f'DELETE FROM "{META_TABLE_NAME}" WHERE table_name = ?', (name,)
-        )
-        self.con.commit()
+        with self.transaction():
+            self.cur.execute(f'DROP TABLE IF EXISTS "{name}"')
+            self.cur.execute(
+                f'DELETE FROM "{META_TABLE_NAME}" WHERE table_name = ?', (name,)
+            )
+        # vacuum cannot run inside a transaction
         self.cur.execute("VACUUM")
 
     def purge_database(self) -> None:
         """deletes all user tables and clears the metadata table"""
         tables = self.get_tables()
-        for table in tables:
-            self.cur.execute(f'DROP TABLE IF EXISTS "{table.name}"')
-        self.cur.execute(f'DELETE FROM "{META_TABLE_NAME}"')
-        self.con.commit()
+        with self.transaction():
+            for table in tables:
+                self.cur.execute(f'DROP TABLE IF EXISTS "{table.name}"')
+            self.cur.execute(f'DELETE FROM "{META_TABLE_NAME}"')
         self.cur.execute("VACUUM")
 
+    def _invalidate_tables_cache(self) -> None:
+        """forgets cached table metadata after a write"""
+        self._tables_cache = None
+
     def get_table(self, name: str) -> Table | None:
-        """retrieves metadata for a single table from the meta table"""
+        """retrieves metadata for a single table, served from an in-memory cache of the meta table"""
         _validate_identifier(name)
-        self.cur.execute(
-            f'SELECT * FROM "{META_TABLE_NAME}" WHERE table_name = ?', (name,)
-        )
-        row = self.cur.fetchone()
-        if not row:
-            return None
-        return Table(
-            name=row["table_name"],
-            columns=json.loads(row["columns"]),
-            count=row["row_count"],
-            created_at=row["created_at"],
-            description=row["description"],
-        )
+        if self._tables_cache is None:
+            with self.acquire() as con:
+                rows = con.execute(f'SELECT * FROM "{META_TABLE_NAME}"').fetchall()
+            self._tables_cache = {
+                row["table_name"]: _table_from_row(row) for row in rows
+            }
+        return self._tables_cache.get(name)
 
     def get_tables(
         self,
@@ -204,57 +462,44 @@ class SqliteStorage(BaseStorage):
             query += " ORDER BY table_name ASC"
 
         self.cur.execute(query, params)
-        return [
-            Table(
-                name=row["table_name"],
-                columns=json.loads(row["columns"]),
-                count=row["row_count"],
-                created_at=row["created_at"],
-                description=row["description"],
-            )
-            for row in self.cur.fetchall()
-        ]
+        return [_table_from_row(row) for row in self.cur.fetchall()]
 
-    def save(self, table: str, data: list[dict[str, Any]]) -> None:
-        """saves data to a table and updates the row count in metadata"""
+    def save(self, table: str, columns: list[str], rows: list[tuple[Any, ...]]) -> None:
+        """saves rows, given as tuples ordered like columns, and updates the row count in metadata"""
         _validate_identifier(table)
-        if not data:
+        if not rows:
             return
 
-        columns = list(data[0].keys())
         for col in columns:
             _validate_identifier(col)
 
         placeholders = ", ".join(["?"] * len(columns))
         query = f'INSERT INTO "{table}" ({", ".join(f'"{c}"' for c in columns)}) VALUES ({placeholders})'
 
-        values = [tuple(row.get(c, None) for c in columns) for row in data]
-        self.cur.executemany(query, values)
-
-        # update row count
-        self.cur.execute(f'SELECT COUNT(*) FROM "{table}"')
-        count = self.cur.fetchone()[0]
-        self.cur.execute(
-            f'UPDATE "{META_TABLE_NAME}" SET row_count = ? WHERE table_name = ?',
-            (count, table),
-        )
-        self.con.commit()
+        # insert the whole batch in one write transaction and bump the row count,
+        # recounting the table after every batch would rescan it each time
+        with self.transaction():
+            self.cur.executemany(query, rows)
+            self.cur.execute(
+                f'UPDATE "{META_TABLE_NAME}" SET row_count = row_count + ? WHERE table_name = ?',
+                (len(rows), table),
+            )
 
     def update_description(self, table_name: str, description: str) -> None:
         """updates the description for a given table in the metadata"""
         _validate_identifier(table_name)
-        self.cur.execute(
-            f'UPDATE "{META_TABLE_NAME}" SET description = ? WHERE table_name = ?',
-            (description, table_name),
-        )
-        self.con.commit()
+        with self.transaction():
+            self.cur.execute(
+                f'UPDATE "{META_TABLE_NAME}" SET description = ? WHERE table_name = ?',
+                (description, table_name),
+            )
 
     def rename_table(self, old_name: str, new_name: str) -> None:
         """renames a table and updates its metadata record"""
         _validate_identifier(old_name)
         _validate_identifier(new_name)
 
-        try:
+        with self.transaction():
             # get old metadata
             meta_row = self.cur.execute(
                 f'SELECT * FROM "{META_TABLE_NAME}" WHERE table_name = ?', (old_name,)
@@ -286,30 +531,19 @@ class SqliteStorage(BaseStorage):
                 f'DELETE FROM "{META_TABLE_NAME}" WHERE table_name = ?', (old_name,)
             )
 
-            self.con.commit()
-        except Exception as e:
-            self.con.rollback()
-            raise e
-
     def update_created_at(self, table_name: str, new_date: str) -> None:
         """updates the created_at timestamp for a given table in the metadata"""
         _validate_identifier(table_name)
-        self.cur.execute(
-            f'UPDATE "{META_TABLE_NAME}" SET created_at = ? WHERE table_name = ?',
-            (new_date, table_name),
-        )
-        self.con.commit()
-
-    def search(
-        self, value: str, targets: list[str] | None = None
-    ) -> dict[str, list[dict[str, Any]]]:
-        """searches for a value in the database across specified targets"""
-        if not targets:
-            targets = [t.name for t in self.get_tables()]
+        with self.transaction():
+            self.cur.execute(
+                f'UPDATE "{META_TABLE_NAME}" SET created_at = ? WHERE table_name = ?',
+                (new_date, table_name),
+            )
 
-        search_pattern = f"%{value}%"
-        all_results: dict[str, list[dict[str, Any]]] = {}
-        all_tables_map = None  # lazy load
+    def _resolve_search_targets(self, targets: list[str]) -> dict[str, list[str]]:
+        """maps every table named by the targets to the columns to search in it"""
+        resolved: dict[str, list[str]] = {}
+        all_tables = None  # lazy load
 
         for target in targets:
             _validate_identifier(target.split(".", 1)[0].replace("*", "all"))
@@ -320,65 +554,169 @@ class SqliteStorage(BaseStorage):
             )
 
             if table_name == "*":
-                if all_tables_map is None:
-                    all_tables_map = {t.name: t for t in self.get_tables()}
-                tables_to_search = list(all_tables_map.values())
+                if all_tables is None:
+                    all_tables = self.get_tables()
+                tables_to_search = all_tables
             else:
                 table = self.get_table(table_name)
                 tables_to_search = [table] if table else []
 
-            if not tables_to_search:
-                continue
-
             for t in tables_to_search:
-                if not column_name:
-                    columns_to_search = t.columns
-                elif column_name == "*":
+                if not column_name or column_name == "*":
                     columns_to_search = t.columns
                 elif column_name in t.columns:
                     columns_to_search = [column_name]
                 else:
-                    columns_to_search = []
-
-                if not columns_to_search:
                     continue
+                # several targets on one table are searched with a single query
+                columns = resolved.setdefault(t.name, [])
+                columns.extend(c for c in columns_to_search if c not in columns)
 
-                # query each table individually to avoid union all errors
-                try:
-                    where_clause = " OR ".join(
-                        f'"{c}" LIKE ?' for c in columns_to_search
-                    )
-                    query = f'SELECT * FROM "{t.name}" WHERE {where_clause}'
-                    params = [search_pattern] * len(columns_to_search)
-
-                    self.cur.execute(query, params)
-                    rows = self.cur.fetchall()
-
-                    if not rows:
-                        continue
+        return resolved
 
-                    if t.name not in all_results:
-                        all_results[t.name] = []
+    def search(
+        self, value: str, targets: list[str] | None = None
+    ) -> Iterator[tuple[str, list[str], list[tuple[Any, ...]]]]:
+        """
+        searches for a value in the database across specified targets
+        yields (table name, column names, rows) for each table with matches, in target order
+        """
+        if not targets:
+            targets = [t.name for t in self.get_tables()]
 
-                    for row in rows:
-                        all_results[t.name].append(dict(row))
+        search_pattern = f"%{value}%"
+        resolved = [
+            (table_name, columns_to_search)
+            for table_name, columns_to_search in self._resolve_search_targets(
+                targets
+            ).items()
+            if columns_to_search
+        ]
+        workers = min(len(resolved), os.process_cpu_count() or 1)
+        if len(resolved) < SEARCH_PARALLEL_MIN_TABLES or workers < 2:
+            for table_name, columns_to_search in resolved:
+                result = self._search_table(
+                    table_name, columns_to_search, search_pattern
+                )
+                if result is not None:
+                    yield result
+            return
 
-                except sqlite3.Error as e:
-                    print(f"error searching in table {t.name}: {e}")
-                    continue  # continue to next table even if one fails
+        # every worker borrows its own pooled connection
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = [
+                executor.submit(
+                    self._search_table, table_name, columns_to_search, search_pattern
+                )
+                for table_name, columns_to_search in resolved
+            ]
+            for future in futures:
+                result = future.result()
+                if result is not None:
+                    yield result
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def _search_table(
+        self, table_name: str, columns_to_search: list[str], search_pattern: str
+    ) -> tuple[str, list[str], list[tuple[Any, ...]]] | None:
+        """runs the LIKE scan for one table, returns none when nothing matched"""
+        # query each table individually to avoid union all errors
+        try:
+            where_clause = " OR ".join(f'"{c}" LIKE ?' for c in columns_to_search)
+            query = f'SELECT * FROM "{table_name}" WHERE {where_clause}'
+            params = [search_pattern] * len(columns_to_search)
+
+            with self.acquire() as con:
+                cur = con.cursor()
+                cur.row_factory = None
+                cur.execute(query, params)
+                rows = cur.fetchall()
+                columns = [d[0] for d in cur.description]
+        except sqlite3.Error as e:
+            print(f"error searching in table {table_name}: {e}")
+            return None  # continue to next table even if one fails
+
+        if not rows:
+            return None
+        return table_name, columns, rows
 
-        return all_results
+    def _refresh_row_counts(self, con: sqlite3.Connection, tables: set[str]) -> None:
+        """recounts the stored row_count of catalog tables a raw query wrote to"""
+        tables.discard(META_TABLE_NAME)
+        if not tables:
+            return
+        placeholders = ", ".join("?" * len(tables))
+        catalog_tables = con.execute(
+            f'SELECT table_name FROM "{META_TABLE_NAME}" WHERE table_name IN ({placeholders})',
+            list(tables),
+        ).fetchall()
+        for (table_name,) in catalog_tables:
+            con.execute(
+                f'UPDATE "{META_TABLE_NAME}" SET row_count = '
+                f"(SELECT COUNT(*) FROM {quote_identifier(table_name)}) "
+                "WHERE table_name = ?",
+                (table_name,),
+            )
 
-    def sql(self, query: str, params: list[Any] | None = None) -> list[dict[str, Any]]:
-        """executes a raw sql query"""
+    def sql(self, query: str, params: list[Any] | None = None) -> QueryResult:
+        """
+        executes a raw sql query and collects every batch of sql_stream
+        columns are empty when the query returned no rows
+        """
+        columns: list[str] = []
+        rows: list[tuple[Any, ...]] = []
+        for batch in self.sql_stream(query, params):
+            columns = batch.columns
+            rows.extend(batch.rows)
+        return QueryResult(columns, rows)
+
+    def sql_stream(
+        self, query: str, params: list[Any] | None = None, batch_size: int = 10_000
+    ) -> Iterator[QueryResult]:
+        """
+        executes a raw sql query and yields its rows in batches of batch_size
+        the query is committed once every batch has been consumed, closing the
+        generator early or an error while streaming rolls it back
+        """
         if params is None:
             params = []
-        self.cur.execute(query, params)
-        rows = self.cur.fetchall()
-        self.con.commit()
-        return [dict(row) for row in rows]
+        with self.acquire() as con:
+            try:
+                cur = con.cursor()
+                cur.row_factory = None
+                written = _execute_tracking_writes(cur, query, params)
+                columns = [d[0] for d in cur.description or ()]
+                while rows := cur.fetchmany(batch_size):
+                    yield QueryResult(columns, rows)
+                self._refresh_row_counts(con, written)
+                con.commit()
+            except BaseException:
+                # includes GeneratorExit, a half-read write is never committed
+                con.rollback()
+                raise
+            finally:
+                # raw queries may touch the metadata table
+                self._invalidate_tables_cache()
+
+    def sql_iter(
+        self, query: str, params: list[Any] | None = None, batch_size: int = 10_000
+    ) -> Iterator[list[tuple[Any, ...]]]:
+        """executes a read query and yields its rows as plain tuples in batches of batch_size"""
+        if params is None:
+            params = []
+        with self.acquire() as con:
+            cur = con.cursor()
+            # tuples are cheaper than sqlite3.Row and csv.writer only needs positions
+            cur.row_factory = None
+            cur.execute(query, params)
+            while rows := cur.fetchmany(batch_size):
+                yield rows
 
     def close(self) -> None:
-        """closes the database connection"""
+        """returns the connection to the pool, closing the pool if it was the last user"""
         if self.con:
-            self.con.close()
+            self._pool.release(self.con)
+            self.con = None
+            _close_pool(self._pool)
@@ -1,18 +1,130 @@
-import questionary
+import os
+import re
+import sys
+from collections.abc import Callable
+
 import typer
-from questionary import Separator
-from rich.console import Console
 
 from . import config
+from ._console import get_console
 from .config import Settings
 
-console = Console()
+# characters that give a pattern regex meaning, anything without them is a plain string
+REGEX_METACHARACTERS = frozenset(".^$*+?{}[]()|\\")
+
+
+def split_literal_pattern(pattern: str) -> tuple[str, str] | None:
+    """
+    returns (kind, literal) when a filter regex is only a plain string, kind is one of
+    "contains", "prefix" (^literal), "suffix" (literal$) or "exact" (^literal$)
+    returns none for patterns that need the regex engine
+    """
+    prefix = pattern.startswith("^")
+    suffix = pattern.endswith("$") and not pattern.endswith("\\$")
+    literal = pattern[1 if prefix else 0 : -1 if suffix else None]
+    if not literal or REGEX_METACHARACTERS.intersection(literal):
+        return None
+    if prefix and suffix:
+        return "exact", literal
+    if prefix:
+        return "prefix", literal
+    if suffix:
+        return "suffix", literal
+    return "contains", literal
+
+
+def compile_filter_test(pattern: str) -> Callable[[str], object]:
+    """returns a function telling whether a value matches the filter regex like re.search,
+    plain string patterns are tested with str operations instead of the regex engine"""
+    literal_pattern = split_literal_pattern(pattern)
+    if literal_pattern is None:
+        return re.compile(pattern).search
+    kind, literal = literal_pattern
+    # $ also matches right before a trailing newline
+    with_newline = literal + "\n"
+    if kind == "contains":
+        return lambda value: literal in value
+    if kind == "prefix":
+        return lambda value: value.startswith(literal)
+    if kind == "suffix":
+        return lambda value: value.endswith(literal) or value.endswith(with_newline)
+    return lambda value: value == literal or value == with_newline
+
+
+def confirm(message: str, default: bool = False) -> bool | None:
+    """
+    asks a yes/no question, returns none if the prompt is cancelled
+    answers the default when stdin is not a terminal
+    """
+    if not sys.stdin.isatty():
+        return default
+    import questionary
+
+    return questionary.confirm(message, default=default).ask()
+
+
+def confirm_destructive(
+    message: str, default: bool = False, assume_yes: bool = False
+) -> bool | None:
+    """confirms a destructive action, answers yes for --yes or CSVCATALOG_YES"""
+    if assume_yes or os.environ.get("CSVCATALOG_YES"):
+        return True
+    return confirm(message, default=default)
+
+
+def ask_password(message: str, **kwargs) -> str | None:
+    """returns CSVCATALOG_PASSWORD when set, otherwise prompts for the password"""
+    password = os.environ.get("CSVCATALOG_PASSWORD")
+    if password:
+        return password
+    import questionary
+
+    return questionary.password(message, **kwargs).ask()
+
+
+def _ask_filter_pattern(column: str, settings: Settings) -> str:
+    """asks for a new or saved regex to apply to a column, returns an empty string to skip"""
+    import questionary
+    from questionary import Separator
+
+    # select a filter (new or saved)
+    filter_choices: list[str | Separator] = ["New one-time regex"]
+    if settings.filters:
+        filter_choices.append(Separator())
+        filter_choices.extend(settings.filters.keys())
+
+    selected_filter = questionary.select(
+        f"select a filter for column '{column}':", choices=filter_choices
+    ).ask()
+
+    if selected_filter is None:
+        raise typer.Abort()
+
+    if selected_filter != "New one-time regex":
+        # used a saved filter
+        return settings.filters[selected_filter]
+
+    regex_pattern = questionary.text("enter regex pattern:").ask()
+    if regex_pattern is None:
+        raise typer.Abort()
+
+    # ask to save the new regex
+    if confirm("do you want to save this new regex for future use?"):
+        filter_name = questionary.text("enter a name for this filter:").ask()
+        if filter_name:
+            settings.filters[filter_name] = regex_pattern
+            config.save_config(settings)
+            get_console().print(f"[green]filter '{filter_name}' saved[/green]")
+    return regex_pattern
 
 
 def define_filters_loop(
     columns_to_export: list[str], settings: Settings
 ) -> dict[str, list[str]]:
     """runs the interactive loop to define regex filters for a set of columns"""
+    import questionary
+    from questionary import Choice
+
     filters: dict[str, list[str]] = {}
     while True:
         # create choices that show which columns already have filters
@@ -20,57 +132,23 @@ def define_filters_loop(
         for col in columns_to_export:
             filter_count = len(filters.get(col, []))
             label = f"{col} ({filter_count} filter(s))" if filter_count > 0 else col
-            col_choices.append(label)
-        col_choices.append("[continue]")
+            col_choices.append(Choice(label, value=col))
 
-        # parse the selection to get the clean column name
-        raw_selection = questionary.select(
-            "select a column to apply a filter to (or 'done'):", choices=col_choices
+        # one checkbox picks every column to filter in this round
+        selected_columns = questionary.checkbox(
+            "select columns to apply a filter to (none to continue):",
+            choices=col_choices,
         ).ask()
 
-        if raw_selection is None:
+        if selected_columns is None:
             raise typer.Abort()
-        if raw_selection == "[continue]":
+        if not selected_columns:
             break
 
-        column_to_filter = raw_selection.split(" (")[0]
-
-        # select a filter (new or saved)
-        filter_choices: list[str | Separator] = ["New one-time regex"]
-        if settings.filters:
-            filter_choices.append(Separator())
-            filter_choices.extend(settings.filters.keys())
-
-        selected_filter = questionary.select(
-            f"select a filter for column '{column_to_filter}':", choices=filter_choices
-        ).ask()
-
-        if selected_filter is None:
-            raise typer.Abort()
-
-        regex_pattern = ""
-        if selected_filter == "New one-time regex":
-            regex_pattern = questionary.text("enter regex pattern:").ask()
-            if regex_pattern is None:
-                raise typer.Abort()
-
-            # ask to save the new regex
-            if questionary.confirm(
-                "do you want to save this new regex for future use?", default=False
-            ).ask():
-                filter_name = questionary.text("enter a name for this filter:").ask()
-                if filter_name:
-                    settings.filters[filter_name] = regex_pattern
-                    config.save_config(settings)
-                    console.print(f"[green]filter '{filter_name}' saved[/green]")
-        else:
-            # used a saved filter
-            regex_pattern = settings.filters[selected_filter]
-
-        if regex_pattern:
-            if column_to_filter not in filters:
-                filters[column_to_filter] = []
-            filters[column_to_filter].append(regex_pattern)
+        for column_to_filter in selected_columns:
+            regex_pattern = _ask_filter_pattern(column_to_filter, settings)
+            if regex_pattern:
+                filters.setdefault(column_to_filter, []).append(regex_pattern)
 
     return filters
 
@@ -79,8 +157,6 @@ def prompt_for_filters(
     columns_to_export: list[str], settings: Settings
 ) -> dict[str, list[str]]:
     """prompts user if they want to add filters, and if so, runs the filter definition loop"""
-    if not questionary.confirm(
-        "add filters to include/exclude rows?", default=False
-    ).ask():
+    if not confirm("add filters to include/exclude rows?"):
         return {}
     return define_filters_loop(columns_to_export, settings)